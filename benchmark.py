@@ -0,0 +1,471 @@
+import time
+import random
+import re
+import json
+import argparse
+import tempfile
+import subprocess
+import sys
+import threading
+import tracemalloc
+from html import escape
+from pathlib import Path
+from typing import Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from corde_scraper import (parsear_concordancia, parsear_concordancias, BufferConcordancias,
+                           REGEX_PATTERN_1, REGEX_PATTERN_3, REGEX_PATTERN_4,
+                           iterar_concordancias_http, extraer_concordancias, configurar_driver,
+                           guardar_resultados, ESCRITORES, PAISES_CORDE)
+
+
+# Valores con los que construimos líneas de concordancia sintéticas
+AUTORES = ['Anónimo', 'Alfonso X', 'Berceo, Gonzalo de', 'Juan Ruiz, Arcipreste de Hita',
+           'Cervantes Saavedra, Miguel de', 'Garcilaso de la Vega']
+TITULOS = ['Fuero de Soria', 'Poema de mio Cid', 'Crónica de Alfonso X', 'Libro de buen amor',
+           'Milagros de Nuestra Señora', 'Don Quijote de la Mancha', 'Cantar XII', 'Obras (VI)']
+PAISES = ['ESPAÑA', 'MÉXICO', 'PERÚ', 'ARGENTINA', 'COSTA RICA', 'CHILE']
+TEMAS = ['10.Verso', '11.Prosa narrativa', '12.Lírica', '21.Derecho', '22.Historia']
+PUBLICACIONES = ['Galo Sánchez', 'Real Academia Española (Madrid)', 'Castalia (Madrid)', 'Gredos (Madrid)']
+CABECERAS = ['Número', 'Concordancia', 'Fecha', 'Autor', 'Título', 'País', 'Tema', 'Publicación']
+CONCORDANCIAS = ['e dixo el rey que fuesen', 'por la merçed de Dios', 'la dicha villa de Soria',
+                 'en aquel tiempo los moros', 'de la qual cosa el conde']
+
+
+def generar_lineas(n:int, semilla:int=0, inicio:int=1) -> list[str]:
+    """
+    Generamos n líneas con la misma forma que las que devuelve el <tt>
+    de una página de concordancias del CORDE (numeradas desde inicio)
+    """
+    rnd = random.Random(semilla)
+    lineas = []
+    for i in range(inicio, inicio + n):
+        anio = rnd.randint(1100, 1975)
+        titulo = rnd.choice(TITULOS)
+        # A veces el país viene pegado al título con un solo espacio
+        separador = rnd.choice(['  ', ' '])
+        lineas.append(
+            f"{i}   {rnd.choice(CONCORDANCIAS)}  **{anio}  {rnd.choice(AUTORES)}  "
+            f"{titulo}{separador}{rnd.choice(PAISES)} {rnd.choice(TEMAS)} {rnd.choice(PUBLICACIONES)}"
+        )
+    return lineas
+
+# Títulos con los que la heurística anterior se equivocaba: acaban en
+# mayúsculas, en números romanos o en signos
+TITULOS_DIFICILES = ['Cantar XII', 'Obras (VI)', 'Carta al REY', 'Historia de ESPAÑA', 'Libro II.',
+                     'Ordenanzas de la CIUDAD de Sevilla', 'Crónica de la ONU', 'Partida IV [Leyes]']
+# Títulos que acaban en siglas o en mayúsculas, para las filas sin país
+TITULOS_SIGLAS = ['Historia de la ONU', 'Estatutos de la UNESCO', 'Informe OTAN', 'Carta al REY',
+                  'Memoria del CSIC', 'Poema de FERNÁN GONZÁLEZ']
+
+# Países que no están en PAISES_CORDE: pegados al título no se pueden separar
+PAISES_FUERA = ['ALEMANIA', 'INGLATERRA', 'AUSTRIA']
+
+def generar_corpus_paises(n:int, semilla:int=0) -> list[tuple[str, list[str]]]:
+    """
+    Corpus de prueba para separar el país del título: líneas como las del
+    CORDE y sus 8 campos correctos. En el 40 % de los casos el país va
+    pegado al título con un solo espacio, en otro 40 % va en su columna y
+    en el 20 % restante la fila no tiene país (el campo correcto es '_')
+    y el título puede acabar en siglas. Uno de cada diez países no está
+    en PAISES_CORDE.
+    """
+    rnd = random.Random(semilla)
+    corpus = []
+    for i in range(1, n + 1):
+        concordancia, anio, autor = rnd.choice(CONCORDANCIAS), rnd.randint(1100, 1975), rnd.choice(AUTORES)
+        tema, publicacion = rnd.choice(TEMAS), rnd.choice(PUBLICACIONES)
+        pais = rnd.choice(PAISES_FUERA) if rnd.random() < 0.1 else rnd.choice(PAISES_CORDE)
+        caso = rnd.random()
+        if caso < 0.8:
+            titulo = rnd.choice(TITULOS + TITULOS_DIFICILES)
+            separador = ' ' if caso < 0.4 else '  '
+            final = f'{titulo}{separador}{pais}'
+        else:
+            titulo = rnd.choice(TITULOS + TITULOS_DIFICILES + TITULOS_SIGLAS)
+            pais = '_'
+            final = titulo
+        linea = f'{i}   {concordancia}  **{anio}  {autor}  {final} {tema} {publicacion}'
+        corpus.append((linea, [str(i), concordancia, str(anio), autor, titulo, pais, tema, publicacion]))
+    return corpus
+
+# parsear_concordancia tal y como era antes del parseo por lotes: la
+# regex del tema recorre la línea hasta el final y las del país se
+# construyen en cada llamada. Se mantiene para medir el antes y el después
+REGEX_PATTERN_2_ORIGINAL = re.compile(r'\s(?=\d+\.[A-Z].+)')
+
+def parsear_concordancia_original(ocurrencia:str) -> list[str]:
+    if not ocurrencia:
+        return []
+    first_processing = ocurrencia.split("**")
+    if len(first_processing) != 2:
+        return [ocurrencia.strip()]
+    num_concord = first_processing[0].strip()
+    year_autor = first_processing[1].strip()
+    result = []
+    result.extend(REGEX_PATTERN_1.split(num_concord))
+    second_processing = REGEX_PATTERN_2_ORIGINAL.split(year_autor)
+    if len(second_processing) == 2:
+        year_autor_2 = second_processing[0].strip()
+        topic_pub = second_processing[1].strip()
+    else:
+        year_autor_2 = year_autor
+        topic_pub = ""
+    result.extend(REGEX_PATTERN_3.split(year_autor_2))
+    if topic_pub:
+        result.extend(REGEX_PATTERN_4.split(topic_pub, maxsplit=1))
+    else:
+        result.append(topic_pub)
+    while len(result) < 8:
+        result.append('_')
+    titulo = result[4]
+    pattern_pais_final = re.compile(
+        r'\b([A-ZÁÉÍÓÚÑÜ]{2,}(?:\s+[A-ZÁÉÍÓÚÑÜ]{2,})*)\b(?=[\s\]\)\.\,\;\:\-]*$)',
+        re.UNICODE
+    )
+    match_pais = pattern_pais_final.search(titulo)
+    if not match_pais:
+        posibles_mayus = re.findall(r'\b[A-ZÁÉÍÓÚÑÜ]{3,}\b', titulo)
+        if posibles_mayus:
+            candidato = posibles_mayus[-1]
+            if not re.fullmatch(
+                r'I{1,3}|IV|V|VI{0,3}|IX|X|XI{0,3}|XV|XX|XXX|XL|L|LX|LXX|XC|C|CC|CCC|CD|D|DC|DCC|CM|M{1,4}',
+                candidato
+            ):
+                match_pais = re.search(re.escape(candidato), titulo)
+    if match_pais:
+        posible_pais = match_pais.group(0).strip()
+        result[4] = re.sub(r'\s*' + re.escape(posible_pais) + r'[\s\]\)\.\,\;\:\-]*', '', titulo).strip()
+        if result[5] not in ['_', '']:
+            result.insert(5, posible_pais)
+            result = result[:8]
+        else:
+            result[5] = posible_pais
+    return result[:8]
+
+def generar_pagina(pagina:int, total_paginas:int, por_pagina:int=25) -> bytes:
+    """
+    Generamos una página de resultados como las del CORDE: el selector
+    del tipo de resultado, el <tt> con la cabecera en <b> y una
+    concordancia por línea y los enlaces <<Anterior>> y <<Siguiente>>
+    en celdas td.texto hacia visualizar?inicio=...
+    """
+    inicio = (pagina - 1) * por_pagina + 1
+    lineas = generar_lineas(por_pagina, semilla=pagina, inicio=inicio)
+    # Como en el CORDE, los espacios se mantienen con &nbsp;
+    filas = '<br>'.join(escape(linea).replace(' ', '&nbsp;') for linea in lineas)
+    enlaces = []
+    if pagina > 1:
+        enlaces.append(f'<td class="texto"><a href="visualizar?inicio={inicio - por_pagina}">&lt;&lt;Anterior</a></td>')
+    if pagina < total_paginas:
+        enlaces.append(f'<td class="texto"><a href="visualizar?inicio={inicio + por_pagina}">Siguiente&gt;&gt;</a></td>')
+    return (
+        '<html><head><meta charset="utf-8"><title>CORDE</title></head><body>'
+        '<form><select name="tipo1"><option>Documentos</option><option selected>Concordancias</option></select></form>'
+        f'<tt><b>{"&nbsp;&nbsp;".join(CABECERAS)}</b><br>{filas}</tt>'
+        f'<table><tr>{"".join(enlaces)}</tr></table>'
+        '</body></html>'
+    ).encode('utf-8')
+
+class ServidorCORDE:
+    """
+    Servidor HTTP local que imita al CORDE con páginas sintéticas: el
+    formulario (/consulta, por GET o POST) devuelve la primera página y
+    visualizar?inicio=n la que empieza en la concordancia n.
+    latencia son los segundos que tarda en responder cada petición.
+    Se usa como context manager y devuelve la consulta para el motor HTTP.
+    """
+
+    def __init__(self, paginas:int, por_pagina:int=25, latencia:float=0, puerto:int=0):
+        self.paginas, self.por_pagina, self.latencia = paginas, por_pagina, latencia
+        self.peticiones = 0
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                servidor.peticiones += 1
+                if servidor.latencia:
+                    time.sleep(servidor.latencia)
+                ruta = urlsplit(self.path)
+                pagina = 1
+                if ruta.path.endswith('visualizar'):
+                    inicio = int(parse_qs(ruta.query).get('inicio', ['1'])[0])
+                    pagina = (inicio - 1) // servidor.por_pagina + 1
+                if not 1 <= pagina <= servidor.paginas:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                cuerpo = generar_pagina(pagina, servidor.paginas, servidor.por_pagina)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                self.do_GET()
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(('127.0.0.1', puerto), Manejador)
+        self.url = f'http://127.0.0.1:{self._http.server_port}'
+
+    @property
+    def consulta(self) -> dict:
+        return {'url': f'{self.url}/consulta', 'metodo': 'post', 'parametros': {'texto': 'sintetico'}}
+
+    def __enter__(self):
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._http.shutdown()
+        self._http.server_close()
+
+def _medir(funcion, repeticiones:int) -> float:
+    """Devuelve el mejor tiempo (en segundos) de varias repeticiones"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+def bench_parseo(n:int, repeticiones:int) -> dict[str, float]:
+    """
+    Medimos las líneas por segundo del parser original (antes), de
+    parsear_concordancia línea a línea y del lote (después)
+    """
+    lineas = generar_lineas(n)
+    casos = {
+        'original': lambda: [parsear_concordancia_original(linea) for linea in lineas],
+        'linea a linea': lambda: [parsear_concordancia(linea) for linea in lineas],
+        'lote': lambda: parsear_concordancias(lineas),
+    }
+    return {nombre: n / _medir(caso, repeticiones) for nombre, caso in casos.items()}
+
+def bench_paises(n:int, repeticiones:int) -> dict[str, tuple[float, float]]:
+    """
+    Comparamos parsear_concordancia (índice de países, ver separar_pais)
+    con el parser original sobre el corpus de prueba: porcentaje de filas
+    con los 8 campos correctos y líneas por segundo
+    """
+    corpus = generar_corpus_paises(n)
+    resultados = {}
+    for nombre, parsear in (('heuristica anterior', parsear_concordancia_original), ('gazetteer', parsear_concordancia)):
+        aciertos = sum(parsear(linea) == campos for linea, campos in corpus)
+        segundos = _medir(lambda: [parsear(linea) for linea, _ in corpus], repeticiones)
+        resultados[nombre] = (100 * aciertos / n, n / segundos)
+    return resultados
+
+def _medir_memoria(funcion) -> tuple[float, float]:
+    """
+    Devuelve la memoria (en MB) que sigue ocupando lo que devuelve la
+    función y el pico de memoria mientras se ejecuta
+    """
+    tracemalloc.start()
+    resultado = funcion()
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del resultado
+    return actual / 2**20, pico / 2**20
+
+def bench_memoria(n:int, por_pagina:int=100) -> dict[str, tuple[float, float]]:
+    """
+    Comparamos la memoria de acumular las concordancias como una lista
+    de diccionarios (una por fila) con la de BufferConcordancias.
+    Las líneas se parsean página a página dentro de la medición, como
+    en la descarga, para que cuenten también los textos de cada fila.
+    """
+    lineas = generar_lineas(n)
+
+    def paginas():
+        for i in range(0, n, por_pagina):
+            yield [dict(zip(CABECERAS, fila)) for fila in parsear_concordancias(lineas[i:i + por_pagina])]
+
+    def diccionarios():
+        return [fila for filas in paginas() for fila in filas]
+
+    def buffer():
+        resultado = BufferConcordancias()
+        for filas in paginas():
+            resultado.extend(filas)
+        return resultado
+
+    return {'diccionarios': _medir_memoria(diccionarios), 'buffer': _medir_memoria(buffer)}
+
+def bench_extraccion(paginas:int,
+                     por_pagina:int=25,
+                     concurrencias:Iterable[int]=(1, 4),
+                     latencia:float=0.05,
+                     navegador:str | None = None,
+                     procesos:Iterable[int] = ()) -> dict[str, float]:
+    """
+    Medimos las páginas por segundo de una descarga completa contra el
+    servidor local: con el motor HTTP para cada concurrencia (sin
+    pipeline y con el pipeline de cada número de procesos) y, si se
+    indica un navegador, con extraer_concordancias (normal y --fast)
+    """
+    resultados = {}
+    with ServidorCORDE(paginas, por_pagina, latencia) as servidor:
+        for concurrencia in concurrencias:
+            for n_procesos in [None, *procesos]:
+                inicio = time.perf_counter()
+                filas = sum(len(pagina) for pagina in iterar_concordancias_http(servidor.consulta,
+                                                                                  concurrencia=concurrencia,
+                                                                                  procesos=n_procesos))
+                segundos = time.perf_counter() - inicio
+                assert filas == paginas * por_pagina, f'Se esperaban {paginas * por_pagina} filas y hay {filas}'
+                nombre = f'http -j {concurrencia}' + (f' -p {n_procesos}' if n_procesos is not None else '')
+                resultados[nombre] = paginas / segundos
+        if navegador:
+            driver = configurar_driver(navegador, headless=True)
+            try:
+                for rapido in (False, True):
+                    driver.get(f'{servidor.url}/consulta')
+                    inicio = time.perf_counter()
+                    filas = len(extraer_concordancias(driver, rapido=rapido))
+                    segundos = time.perf_counter() - inicio
+                    assert filas == paginas * por_pagina, f'Se esperaban {paginas * por_pagina} filas y hay {filas}'
+                    resultados[f'{navegador}{" --fast" if rapido else ""}'] = paginas / segundos
+            finally:
+                driver.quit()
+    return resultados
+
+def bench_exportacion(n:int, formatos:Iterable[str]) -> dict[str, tuple[float, int]]:
+    """
+    Medimos lo que tarda guardar_resultados con n concordancias en cada
+    formato y el tamaño del fichero que genera
+    """
+    lineas = generar_lineas(n)
+    resultados = BufferConcordancias(dict(zip(CABECERAS, fila)) for fila in parsear_concordancias(lineas))
+    # pandas, openpyxl y pyarrow se importan la primera vez que se usan:
+    # guardamos unas pocas filas en cada formato sin medir para que ese
+    # tiempo no se lo lleve el primer formato
+    muestra = BufferConcordancias(dict(zip(CABECERAS, fila)) for fila in parsear_concordancias(lineas[:10]))
+    with tempfile.TemporaryDirectory() as directorio:
+        for formato in formatos:
+            guardar_resultados(muestra, formato, Path(directorio))
+    medidas = {}
+    for formato in formatos:
+        with tempfile.TemporaryDirectory() as directorio:
+            inicio = time.perf_counter()
+            guardar_resultados(resultados, formato, Path(directorio))
+            segundos = time.perf_counter() - inicio
+            tamanio = sum(fichero.stat().st_size for fichero in Path(directorio).rglob('*') if fichero.is_file())
+        medidas[formato] = (segundos, tamanio)
+    return medidas
+
+# Módulos que no deberían cargarse solo por importar corde_scraper
+MODULOS_PESADOS = ['pandas', 'numpy', 'pyarrow', 'requests', 'bs4', 'openpyxl', 'selenium',
+                   'webdriver_manager', 'pyautogui']
+SCRIPT_IMPORTAR = (
+    'import sys, time, json\n'
+    'inicio = time.perf_counter()\n'
+    'import corde_scraper\n'
+    'segundos = time.perf_counter() - inicio\n'
+    'print(json.dumps([segundos, sorted(m for m in {modulos!r} if m in sys.modules)]))\n'
+)
+
+def bench_arranque(repeticiones:int) -> dict[str, tuple[float, list[str]]]:
+    """
+    Medimos en procesos nuevos lo que tarda importar corde_scraper y lo
+    que tarda `corde_scraper.py --help` de principio a fin, junto con los
+    módulos pesados que se han cargado al importarlo. Nos quedamos con el
+    mínimo de las repeticiones, que es lo menos ruidoso.
+    """
+    directorio = Path(__file__).resolve().parent
+    importar = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', SCRIPT_IMPORTAR.format(modulos=MODULOS_PESADOS)],
+                                cwd=directorio, capture_output=True, text=True, check=True).stdout
+        segundos, cargados = json.loads(salida)
+        importar.append(segundos)
+    ayuda = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, str(directorio / 'corde_scraper.py'), '--help'],
+                       cwd=directorio, capture_output=True, check=True)
+        ayuda.append(time.perf_counter() - inicio)
+    return {'import corde_scraper': (min(importar), cargados),
+            'corde_scraper --help': (min(ayuda), cargados)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del scraper del CORDE.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    parseo = subparsers.add_parser('parseo', help='Líneas por segundo de parsear_concordancia.')
+    parseo.add_argument('-n', '--lineas', type=int, default=200_000, help='Número de líneas sintéticas.')
+    parseo.add_argument('-r', '--repeticiones', type=int, default=3, help='Repeticiones por caso.')
+    paises = subparsers.add_parser('paises', help='Aciertos y velocidad al separar el país del título.')
+    paises.add_argument('-n', '--titulos', type=int, default=100_000, help='Número de líneas del corpus.')
+    paises.add_argument('-r', '--repeticiones', type=int, default=3, help='Repeticiones por caso.')
+    memoria = subparsers.add_parser('memoria', help='Memoria de las concordancias acumuladas.')
+    memoria.add_argument('-n', '--lineas', type=int, default=200_000, help='Número de líneas sintéticas.')
+    extraccion = subparsers.add_parser('extraccion', help='Páginas por segundo de una descarga completa contra un servidor local.')
+    extraccion.add_argument('-p', '--paginas', type=int, default=200, help='Páginas de resultados.')
+    extraccion.add_argument('--por-pagina', type=int, default=25, help='Concordancias por página.')
+    extraccion.add_argument('-j', '--concurrencia', type=int, nargs='+', default=[1, 4], help='Concurrencias del motor HTTP.')
+    extraccion.add_argument('--procesos', type=int, nargs='*', default=[],
+                            help='Mide también el pipeline (--procesos) con estos números de procesos.')
+    extraccion.add_argument('--latencia', type=float, default=50, help='Milisegundos que tarda el servidor en cada página.')
+    extraccion.add_argument('-b', '--browser', choices=['chrome', 'firefox', 'edge'], default=None,
+                            help='Mide también extraer_concordancias con este navegador (sin ventana).')
+    exportacion = subparsers.add_parser('exportacion', help='Tiempo de guardar_resultados en cada formato.')
+    exportacion.add_argument('-n', '--lineas', type=int, default=200_000, help='Número de concordancias.')
+    exportacion.add_argument('-f', '--format', nargs='+', choices=list(ESCRITORES), default=list(ESCRITORES),
+                             help='Formatos que se miden.')
+    arranque = subparsers.add_parser('arranque', help='Tiempo de importar corde_scraper y de --help; falla si supera el presupuesto.')
+    arranque.add_argument('-r', '--repeticiones', type=int, default=5, help='Repeticiones por caso.')
+    arranque.add_argument('--presupuesto', type=float, default=0.5,
+                          help='Segundos máximos de cada caso; además no debe cargarse ningún módulo pesado.')
+    servidor = subparsers.add_parser('servidor', help='Sirve páginas sintéticas del CORDE hasta pulsar Ctrl+C.')
+    servidor.add_argument('-p', '--paginas', type=int, default=200, help='Páginas de resultados.')
+    servidor.add_argument('--por-pagina', type=int, default=25, help='Concordancias por página.')
+    servidor.add_argument('--latencia', type=float, default=0, help='Milisegundos que tarda el servidor en cada página.')
+    servidor.add_argument('--puerto', type=int, default=8000, help='Puerto en el que escucha.')
+    args = parser.parse_args()
+
+    if args.benchmark == 'parseo':
+        for nombre, velocidad in bench_parseo(args.lineas, args.repeticiones).items():
+            print(f'{nombre:<20} {velocidad:>12,.0f} líneas/s')
+    elif args.benchmark == 'paises':
+        for nombre, (aciertos, velocidad) in bench_paises(args.titulos, args.repeticiones).items():
+            print(f'{nombre:<20} {aciertos:>6.1f} % aciertos {velocidad:>12,.0f} líneas/s')
+    elif args.benchmark == 'memoria':
+        for nombre, (actual, pico) in bench_memoria(args.lineas).items():
+            print(f'{nombre:<20} {actual:>10,.1f} MB ocupados {pico:>10,.1f} MB de pico')
+    elif args.benchmark == 'extraccion':
+        velocidades = bench_extraccion(args.paginas, args.por_pagina, args.concurrencia,
+                                       args.latencia / 1000, args.browser, args.procesos)
+        for nombre, velocidad in velocidades.items():
+            print(f'{nombre:<20} {velocidad:>12,.1f} páginas/s')
+    elif args.benchmark == 'exportacion':
+        for formato, (segundos, tamanio) in bench_exportacion(args.lineas, args.format).items():
+            print(f'{formato:<20} {segundos:>10,.2f} s {args.lineas / segundos:>12,.0f} filas/s {tamanio / 2**20:>8,.1f} MB')
+    elif args.benchmark == 'arranque':
+        fallos = []
+        for nombre, (segundos, cargados) in bench_arranque(args.repeticiones).items():
+            print(f'{nombre:<20} {segundos:>10,.3f} s')
+            if segundos > args.presupuesto:
+                fallos.append(f'{nombre} tarda {segundos:.3f} s (presupuesto {args.presupuesto} s)')
+        if cargados:
+            fallos.append(f'importar corde_scraper carga {", ".join(cargados)}')
+        if fallos:
+            sys.exit('\n'.join(fallos))
+    elif args.benchmark == 'servidor':
+        with ServidorCORDE(args.paginas, args.por_pagina, args.latencia / 1000, args.puerto) as servidor:
+            print(f'Consulta para --http: {json.dumps(servidor.consulta)}')
+            try:
+                while True:
+                    time.sleep(1)
+            except KeyboardInterrupt:
+                pass
+
+if __name__ == "__main__":
+    main()
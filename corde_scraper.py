@@ -1,36 +1,209 @@
+from __future__ import annotations
+
 import os
 import time
 import logging
-import pyautogui
 import re
 import argparse
 import platform
 import shutil
-import pandas as pd
+import csv
+import json
+import importlib.util
+import threading
+import queue
+import gzip
+import hashlib
+import unicodedata
+import cProfile
+import sqlite3
+import multiprocessing
 from pathlib import Path
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import StaleElementReferenceException, NoAlertPresentException
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from itertools import zip_longest
+from itertools import zip_longest, chain
+from functools import partial, wraps
+from typing import Callable, Iterable, Iterator
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from datetime import date, datetime
+from typing import TYPE_CHECKING
+
+# pandas, pyarrow, requests, bs4, openpyxl, selenium y webdriver-manager
+# tardan en importarse, así que solo se importan dentro de las funciones
+# que los usan: el script arranca rápido (--help, reparse, query...) y
+# el parseo no necesita ninguno de ellos
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+    import requests
 
 
 # Primera regex para dividir la línea en dos bloques
 REGEX_PATTERN_1 = re.compile(r'(?<=\d)\s{2,}')
 # Segunda regex para separar el tema y la publicación
-REGEX_PATTERN_2 = re.compile(r'\s(?=\d+\.[A-Z].+)')
+# (basta con mirar un carácter tras la letra: equivale a '.+' sin recorrer la línea)
+REGEX_PATTERN_2 = re.compile(r'\s(?=\d+\.[A-Z].)')
 # Tercera regex para el año y el autor
 REGEX_PATTERN_3 = re.compile(r'\s{2,}')
 # Cuarta regex para obtener el tema y la publicación por separado
 REGEX_PATTERN_4 = re.compile(r'\s(?=[A-Z])')
+# Código con el que empieza el tema (10.Verso, 21.Prosa...)
+REGEX_TEMA = re.compile(r'\d+\.')
+# Signos que pueden ir entre el país y el final del título
+SIGNOS_FIN_TITULO = ' ])}.,;:-'
+
+# Países de los textos del CORDE, tal y como aparecen en las concordancias.
+# Solo se separan del título los países de esta lista (ver separar_pais)
+PAISES_CORDE = (
+    'ARGENTINA', 'BOLIVIA', 'CHILE', 'COLOMBIA', 'COSTA RICA', 'CUBA', 'ECUADOR',
+    'EL SALVADOR', 'ESPAÑA', 'ESTADOS UNIDOS', 'FILIPINAS', 'GUATEMALA',
+    'GUINEA ECUATORIAL', 'HONDURAS', 'MÉXICO', 'NICARAGUA', 'PANAMÁ', 'PARAGUAY',
+    'PERÚ', 'PUERTO RICO', 'REPÚBLICA DOMINICANA', 'URUGUAY', 'VENEZUELA',
+    # Textos (sobre todo sefardíes y de imprentas europeas) escritos fuera de América y España
+    'BÉLGICA', 'FRANCIA', 'GRECIA', 'ITALIA', 'MARRUECOS', 'PAÍSES BAJOS', 'PORTUGAL', 'TURQUÍA',
+)
+
+# Filas de datos que caben en una hoja de Excel (sin contar la cabecera)
+LIMITE_FILAS_EXCEL = 1_048_575
+# Filas por row group / record batch en los formatos columnares
+FILAS_POR_GRUPO = 50_000
+# Columnas que se guardan como categóricas (sin tildes y en minúsculas)
+COLUMNAS_CATEGORICAS = {'autor', 'titulo', 'pais', 'tema', 'fecha'}
+# Columnas de la base de datos local y su nombre en las cabeceras del CORDE
+COLUMNAS_BD = {'numero': 'Número', 'concordancia': 'Concordancia', 'fecha': 'Fecha', 'autor': 'Autor',
+               'titulo': 'Título', 'pais': 'País', 'tema': 'Tema', 'publicacion': 'Publicación'}
+# Columna con el número (ID) de cada concordancia
+COLUMNA_ID = COLUMNAS_BD['numero']
+# Año (el primero) de una fecha del CORDE: 1250, c 1250, 1236-1246...
+REGEX_ANIO = re.compile(r'\d{3,4}')
+
+# URL del CORDE
+CORDE_URL = 'https://corpus.rae.es/cordenet.html'
+# User-Agent del motor HTTP
+USER_AGENT = 'Mozilla/5.0 (compatible; corde-scraper)'
+# Usamos lxml si está instalado: es bastante más rápido que html.parser
+PARSER_HTML = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# Espacios en blanco de las cabeceras
+REGEX_ESPACIOS = re.compile(r'\s+')
+
+# Script que lee en una sola llamada todo lo que necesitamos de una página
+# de resultados: cabecera, texto de las concordancias y enlace <<Siguiente>>.
+# De paso anulamos el aviso de beforeunload para poder navegar sin alertas.
+SCRIPT_LEER_PAGINA = """
+window.onbeforeunload = null;
+window.addEventListener('beforeunload', e => e.stopImmediatePropagation(), true);
+const contenedor = document.querySelector('tt');
+if (!contenedor) {
+    return null;
+}
+const cabecera = contenedor.querySelector('b');
+const enlace = Array.from(document.querySelectorAll("td.texto a[href*='visualizar']"))
+    .find(a => a.textContent.includes('Siguiente')) || null;
+return {
+    cabecera: cabecera ? cabecera.innerText : '',
+    texto: contenedor.innerText,
+    siguiente: enlace ? enlace.href : null,
+    enlace: enlace,
+    contenedor: contenedor
+};
+"""
+
+
+class Perfil:
+    """
+    Instrumentación de una ejecución: tiempos por etapa (lectura de la
+    página, navegación, parseo, escritura...), tiempos de cada página,
+    contadores de filas parseadas, omitidas y duplicadas y llamadas al
+    WebDriver.
+    Está desactivado por defecto (medir y contar no hacen nada); main lo
+    activa con --profile. Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self):
+        self.activo = False
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        # etapa -> [veces, segundos]
+        self.etapas = {}
+        self.paginas = []
+        self.contadores = {}
+
+    @contextmanager
+    def medir(self, etapa:str, pagina:int | None = None):
+        """Mide lo que tarda el bloque y lo suma a la etapa (y a la página)"""
+        if not self.activo:
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.anotar(etapa, time.perf_counter() - inicio, pagina)
+
+    def anotar(self, etapa:str, segundos:float, pagina:int | None = None) -> None:
+        """
+        Suma a la etapa (y a la página) una duración ya medida, por ejemplo
+        en otro proceso, donde este perfil no está activo
+        """
+        if not self.activo:
+            return
+        with self._lock:
+            acumulado = self.etapas.setdefault(etapa, [0, 0.0])
+            acumulado[0] += 1
+            acumulado[1] += segundos
+            if pagina is not None:
+                self.paginas.append({'pagina': pagina, 'etapa': etapa, 'segundos': segundos})
+
+    def medido(self, etapa:str):
+        """Decorador: mide cada llamada a la función como la etapa indicada"""
+        def decorador(funcion):
+            @wraps(funcion)
+            def envoltura(*args, **kwargs):
+                with self.medir(etapa):
+                    return funcion(*args, **kwargs)
+            return envoltura
+        return decorador
+
+    def contar(self, contador:str, n:int=1) -> None:
+        if self.activo:
+            with self._lock:
+                self.contadores[contador] = self.contadores.get(contador, 0) + n
+
+    def resumen(self) -> dict:
+        return {
+            'etapas': {etapa: {'veces': veces, 'segundos': segundos, 'media': segundos / veces}
+                       for etapa, (veces, segundos) in sorted(self.etapas.items())},
+            'contadores': dict(sorted(self.contadores.items())),
+            'paginas': sorted(self.paginas, key=lambda medida: (medida['pagina'], medida['etapa'])),
+        }
+
+    def guardar(self, ruta:Path) -> None:
+        """
+        Guardamos las medidas en JSON o, si la ruta acaba en .csv, en un
+        CSV con una fila por etapa, por contador y por página
+        """
+        resumen = self.resumen()
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        if ruta.suffix.lower() != '.csv':
+            ruta.write_text(json.dumps(resumen, ensure_ascii=False, indent=2), encoding='utf-8')
+            return
+        with open(ruta, 'w', newline='', encoding='utf-8') as fichero:
+            escritor = csv.writer(fichero)
+            escritor.writerow(['tipo', 'nombre', 'pagina', 'veces', 'segundos'])
+            for etapa, medida in resumen['etapas'].items():
+                escritor.writerow(['etapa', etapa, '', medida['veces'], medida['segundos']])
+            for contador, valor in resumen['contadores'].items():
+                escritor.writerow(['contador', contador, '', valor, ''])
+            for medida in resumen['paginas']:
+                escritor.writerow(['pagina', medida['etapa'], medida['pagina'], 1, medida['segundos']])
+
+# Perfil de la ejecución en curso (ver --profile)
+PERFIL = Perfil()
 
 def download_driver(navegador:str, drivers_dir:Path) -> Path:
     """
@@ -39,18 +212,21 @@ def download_driver(navegador:str, drivers_dir:Path) -> Path:
     """
     current_platform = platform.system().lower()
     if navegador =='chrome':
+        from webdriver_manager.chrome import ChromeDriverManager
         downloaded_path =  ChromeDriverManager().install()
         # Definimos el nombre correcto del archivo en funicón del OS
         target_file = "chromedriver.exe" if current_platform == "windows" else "chromedriver"
         target_path = drivers_dir / target_file
     
     elif navegador == 'firefox':
+        from webdriver_manager.firefox import GeckoDriverManager
         downloaded_path = GeckoDriverManager().install()
         # Definimos el nombre correcto del archivo en función del OS
         target_file = "geckodriver.exe" if current_platform == "windows" else "geckodriver"
         target_path = drivers_dir / target_file
     
     elif navegador == 'edge':
+        from webdriver_manager.microsoft import EdgeChromiumDriverManager
         downloaded_path = EdgeChromiumDriverManager().install()
         # Definimos el nombre correcto del archivo en función del OS
         target_file = "msedgedriver.exe" if current_platform == "windows" else "msedgedriver"
@@ -62,7 +238,27 @@ def download_driver(navegador:str, drivers_dir:Path) -> Path:
         shutil.copy2(downloaded_path, target_path)
     return target_path
 
-def configurar_driver(navegador):
+def medir_llamadas_driver(driver):
+    """
+    Envolvemos driver.execute, por donde pasan todas las órdenes al
+    navegador (también las de los elementos), para contar las idas y
+    vueltas al WebDriver y su tiempo por tipo de orden
+    """
+    execute = driver.execute
+    def execute_medido(driver_command, params=None):
+        PERFIL.contar('llamadas_webdriver')
+        with PERFIL.medir(f'webdriver {driver_command}'):
+            return execute(driver_command, params)
+    driver.execute = execute_medido
+    return driver
+
+@PERFIL.medido('configurar_driver')
+def configurar_driver(navegador, headless:bool=False):
+    """
+    Configuramos el driver del navegador indicado reutilizando el binario
+    de drivers/<plataforma> si ya se descargó. Con headless=True el
+    navegador se arranca sin ventana (para ejecuciones desatendidas).
+    """
     try:
         logging.info(f"Configurando driver para {navegador}...")
         # Determinamos el directorio base (donde se encuentra este script)
@@ -88,10 +284,15 @@ def configurar_driver(navegador):
             if not downloaded_driver.exists():
                 raise FileNotFoundError(f"ChromeDriver no encontrado en {downloaded_driver}")
             
-            options = webdriver.ChromeOptions()
+            from selenium.webdriver import Chrome, ChromeOptions
+            from selenium.webdriver.chrome.service import Service as ChromeService
+            options = ChromeOptions()
             options.add_argument("--start-maximized")
+            if headless:
+                options.add_argument("--headless=new")
+                options.add_argument("--window-size=1920,1080")
             service = ChromeService(executable_path=downloaded_driver)
-            driver = webdriver.Chrome(service=service, options=options)
+            driver = Chrome(service=service, options=options)
 
         elif navegador.lower() == 'firefox':
             driver_file = "geckodriver.exe" if current_platform == "windows" else "geckodriver"
@@ -107,10 +308,15 @@ def configurar_driver(navegador):
             if not downloaded_driver.exists():
                 raise FileNotFoundError(f"ChromeDriver no encontrado en {downloaded_driver}")
             
-            options = webdriver.FirefoxOptions()
+            from selenium.webdriver import Firefox, FirefoxOptions
+            from selenium.webdriver.firefox.service import Service as FirefoxService
+            options = FirefoxOptions()
+            if headless:
+                options.add_argument("-headless")
             service = FirefoxService(executable_path=downloaded_driver)
-            driver = webdriver.Firefox(service=service, options=options)
-            driver.maximize_window()  # Maximizar la ventana de Firefox
+            driver = Firefox(service=service, options=options)
+            if not headless:
+                driver.maximize_window()  # Maximizar la ventana de Firefox
 
         elif navegador.lower() == 'edge':
             driver_file = "msedgedriver.exe" if current_platform == "windows" else "msedgedriver"
@@ -126,21 +332,87 @@ def configurar_driver(navegador):
             if not downloaded_driver.exists():
                 raise FileNotFoundError(f"ChromeDriver no encontrado en {downloaded_driver}")
             
-            options = webdriver.EdgeOptions()
+            from selenium.webdriver import Edge, EdgeOptions
+            from selenium.webdriver.edge.service import Service as EdgeService
+            options = EdgeOptions()
             options.add_argument("--start-maximized")
+            if headless:
+                options.add_argument("--headless=new")
+                options.add_argument("--window-size=1920,1080")
             service = EdgeService(executable_path=downloaded_driver)
-            driver = webdriver.Edge(service=service, options=options)
+            driver = Edge(service=service, options=options)
 
         else:
             raise ValueError(f"Navegador no soportado: {navegador}")
         
         driver.browser_name = navegador.capitalize()
+        if PERFIL.activo:
+            medir_llamadas_driver(driver)
         return driver
 
     except Exception as e:
         logging.error(f"Error en configurar_driver: {e}")
         raise
 
+class Gazetteer:
+    """
+    Índice de etiquetas de una o varias palabras (los países del CORDE,
+    por ejemplo) en forma de trie por palabras, empezando por la última.
+    Así encontramos en una sola pasada desde el final del texto la
+    etiqueta más larga con la que termina.
+    """
+
+    def __init__(self, etiquetas:Iterable[str]):
+        self._raiz = {}
+        self.profundidad = 0
+        for etiqueta in etiquetas:
+            palabras = etiqueta.split()
+            nodo = self._raiz
+            for palabra in reversed(palabras):
+                nodo = nodo.setdefault(palabra, {})
+            # La clave None marca que aquí termina una etiqueta
+            nodo[None] = etiqueta
+            self.profundidad = max(self.profundidad, len(palabras))
+
+    def sufijo(self, palabras:list[str]) -> int:
+        """
+        Devolvemos cuántas de las últimas palabras forman la etiqueta más
+        larga del índice, o 0 si no terminan en ninguna
+        """
+        nodo, encontradas = self._raiz, 0
+        for i in range(1, min(len(palabras), self.profundidad) + 1):
+            nodo = nodo.get(palabras[-i])
+            if nodo is None:
+                break
+            if None in nodo:
+                encontradas = i
+        return encontradas
+
+# Índice de los países, se construye una sola vez
+GAZETTEER_PAISES = Gazetteer(PAISES_CORDE)
+
+def separar_pais(titulo:str, siguiente:str) -> tuple[str, str | None]:
+    """
+    Separamos el país cuando viene pegado al final del título (con un
+    solo espacio). Solo puede pasar si la columna siguiente no es ya el
+    país, es decir, si es el tema o está vacía: así un título que acaba
+    en mayúsculas ("Cantar XII", "Historia de ESPAÑA") no pierde su final.
+    Solo separamos países del índice (GAZETTEER_PAISES): una palabra en
+    mayúsculas cualquiera al final ("Historia de la ONU") es parte del
+    título, y parsear_concordancia deja el país vacío.
+    Devuelve el título sin el país y el país, o el título tal cual y None.
+    """
+    if siguiente not in ('_', '') and not REGEX_TEMA.match(siguiente):
+        return titulo, None
+    recortado = titulo.rstrip(SIGNOS_FIN_TITULO)
+    palabras = recortado.split()
+    n = GAZETTEER_PAISES.sufijo(palabras)
+    if not n:
+        return titulo, None
+    pais = ' '.join(palabras[-n:])
+    resto = recortado.rsplit(maxsplit=n)[0] if n < len(palabras) else ''
+    return resto.strip(), pais
+
 def parsear_concordancia(ocurrencia: str) -> list[str]:
     """
     Dado un string que contiene las columnas que debemos extraer,
@@ -158,8 +430,7 @@ def parsear_concordancia(ocurrencia: str) -> list[str]:
     num_concord = first_processing[0].strip()
     year_autor = first_processing[1].strip()
 
-    result = []
-    result.extend(REGEX_PATTERN_1.split(num_concord))
+    result = REGEX_PATTERN_1.split(num_concord)
 
     # Separación año / autor
     second_processing = REGEX_PATTERN_2.split(year_autor)
@@ -174,53 +445,546 @@ def parsear_concordancia(ocurrencia: str) -> list[str]:
 
     # Separación título / país
     if topic_pub:
-        partes = REGEX_PATTERN_4.split(topic_pub, maxsplit=1)
-        result.extend(partes)
+        result.extend(REGEX_PATTERN_4.split(topic_pub, maxsplit=1))
     else:
         result.append(topic_pub)
 
     # Rellenamos hasta 8 campos
-    while len(result) < 8:
-        result.append('_')
+    if len(result) < 8:
+        result.extend(['_'] * (8 - len(result)))
 
-    titulo = result[4]
-
-    # Buscamos el país
-    pattern_pais_final = re.compile(
-        r'\b([A-ZÁÉÍÓÚÑÜ]{2,}(?:\s+[A-ZÁÉÍÓÚÑÜ]{2,})*)\b(?=[\s\]\)\.\,\;\:\-]*$)',
-        re.UNICODE
-    )
-    match_pais = pattern_pais_final.search(titulo)
-
-    if not match_pais:
-        posibles_mayus = re.findall(r'\b[A-ZÁÉÍÓÚÑÜ]{3,}\b', titulo)
-        if posibles_mayus:
-            candidato = posibles_mayus[-1]  # tomamos la última palabra en mayúsculas
-            # Excluir números romanos
-            if not re.fullmatch(
-                r'I{1,3}|IV|V|VI{0,3}|IX|X|XI{0,3}|XV|XX|XXX|XL|L|LX|LXX|XC|C|CC|CCC|CD|D|DC|DCC|CM|M{1,4}',
-                candidato
-            ):
-                match_pais = re.search(re.escape(candidato), titulo)
-
-    # Separamos el título y el país
-    if match_pais:
-        posible_pais = match_pais.group(0).strip()
-        # Eliminamos solo el país detectado del título
-        result[4] = re.sub(r'\s*' + re.escape(posible_pais) + r'[\s\]\)\.\,\;\:\-]*', '', titulo).strip()
+    # Separamos el título y el país (si venía pegado al título)
+    titulo, posible_pais = separar_pais(result[4], result[5])
+    if posible_pais:
+        result[4] = titulo
 
         if result[5] not in ['_', '']:
             result.insert(5, posible_pais)
-            result = result[:8]
         else:
             result[5] = posible_pais
+    elif REGEX_TEMA.match(result[5]):
+        # El tema ha caído en la columna del país: la fila no tiene país
+        # (o está pegado al título y no es de PAISES_CORDE). Lo dejamos
+        # vacío para que el tema y la publicación sigan en su columna
+        result.insert(5, '_')
 
     return result[:8]
 
-def extraer_concordancias(driver):
+def parsear_concordancias(ocurrencias: Iterable[str]) -> list[list[str]]:
     """
-    Vamos a extraer todas las concordancias que se han extraído para un 
-    mismo resultado.
+    Parseamos un lote de líneas (una página o una ejecución completa) y
+    devolvemos solo las que son concordancias, cada una con sus 8 campos.
+    Las líneas vacías o sin "**" (cabeceras, pies...) se descartan.
+    """
+    result = []
+    for ocurrencia in ocurrencias:
+        processed = parsear_concordancia(ocurrencia)
+        if len(processed) > 1:
+            result.append(processed)
+    return result
+
+def _nombre_consulta(consulta:str) -> str:
+    """
+    Normalizamos el nombre de la consulta para poder usarlo como fichero
+    """
+    nombre = re.sub(r'[^\w\-]+', '_', consulta).strip('_')
+    if not nombre:
+        raise ValueError('Nombre de consulta no válido')
+    return nombre
+
+def ruta_indice(consulta:str, output_path:Path) -> Path:
+    """
+    Devuelve el fichero del índice de concordancias ya descargadas para
+    una consulta.
+    """
+    return output_path / 'indices' / f'{_nombre_consulta(consulta)}.txt'
+
+def _valor_columna(fila:dict, columna:str) -> str:
+    """
+    Devuelve el valor de una columna de COLUMNAS_BD ('numero', 'fecha'...)
+    buscándola por su nombre, con o sin tildes
+    """
+    etiqueta = COLUMNAS_BD[columna]
+    if etiqueta in fila:
+        return fila[etiqueta]
+    for nombre, valor in fila.items():
+        if _normalizar_columna(nombre) == columna:
+            return valor
+    raise KeyError(f'La concordancia no tiene columna {etiqueta}')
+
+def id_fila(fila:dict) -> str:
+    """
+    Devuelve el número (ID) de una concordancia: su posición en los
+    resultados de la consulta
+    """
+    return _valor_columna(fila, 'numero')
+
+def clave_concordancia(concordancia:str, fecha:str, autor:str, titulo:str) -> str:
+    """
+    Huella de una concordancia para el índice. El número es solo su
+    posición en los resultados y cambia si la consulta se amplía, así que
+    usamos un hash del texto, la fecha, el autor y el título.
+    """
+    texto = '\x1f'.join((concordancia, fecha, autor, titulo))
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+
+def clave_fila(fila:dict) -> str:
+    """Huella (ver clave_concordancia) de una concordancia ya convertida en diccionario"""
+    return clave_concordancia(*(_valor_columna(fila, columna) for columna in ('concordancia', 'fecha', 'autor', 'titulo')))
+
+def cargar_indice(ruta:Path) -> set[str]:
+    """
+    Leemos el índice de concordancias ya exportadas: una huella (ver
+    clave_concordancia) por línea.
+    Si el índice aún no existe devolvemos un conjunto vacío.
+    """
+    if not ruta.exists():
+        return set()
+    with open(ruta, encoding='utf-8') as f:
+        return {linea.strip() for linea in f if linea.strip()}
+
+def guardar_indice(ruta:Path, claves:Iterable[str]) -> None:
+    """
+    Añadimos al final del índice las huellas de las concordancias exportadas
+    """
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.writelines(f'{clave}\n' for clave in claves)
+
+def ruta_checkpoint(consulta:str | None, output_path:Path) -> Path:
+    """
+    Devuelve el fichero de checkpoint de una consulta (o de la última
+    consulta sin nombre)
+    """
+    return output_path / 'checkpoints' / f"{_nombre_consulta(consulta or 'ultima')}.json"
+
+def guardar_checkpoint(ruta:Path, punto:dict) -> None:
+    """
+    Guardamos el punto de control de forma atómica: escribimos en un
+    temporal y lo renombramos, así un corte nunca deja el JSON a medias
+    """
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix('.tmp')
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(punto, f, ensure_ascii=False, indent=2)
+    os.replace(temporal, ruta)
+
+def cargar_checkpoint(ruta:Path) -> dict | None:
+    """
+    Leemos el último punto de control guardado, si existe
+    """
+    if not ruta.exists():
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+class CachePaginas:
+    """
+    Caché en disco de las páginas de resultados (cabecera y texto del
+    <tt>) de una consulta, para poder volver a parsearlas sin descargarlas.
+    - Cada página se guarda comprimida con gzip en objetos/, con su hash
+      SHA-256 como nombre: las páginas idénticas se guardan una sola vez.
+    - consultas/<consulta>.txt relaciona cada número de página con su hash.
+    - Si la caché supera max_bytes se borran los objetos usados hace más
+      tiempo (LRU según la fecha de modificación, que se actualiza al leer).
+    """
+
+    def __init__(self, directorio:Path, consulta:str | None, max_bytes:int | None = None):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self._objetos = directorio / 'objetos'
+        self._indice = directorio / 'consultas' / f"{_nombre_consulta(consulta or 'ultima')}.txt"
+        self._objetos.mkdir(parents=True, exist_ok=True)
+        self._indice.parent.mkdir(parents=True, exist_ok=True)
+        self._tamanio = None
+
+    def _ruta_objeto(self, clave:str) -> Path:
+        return self._objetos / clave[:2] / f'{clave}.gz'
+
+    def guardar(self, pagina:int, header_element:str, texto:str) -> None:
+        """Guardamos una página y la apuntamos en el índice de la consulta"""
+        contenido = json.dumps({'cabecera': header_element, 'texto': texto}, ensure_ascii=False).encode('utf-8')
+        clave = hashlib.sha256(contenido).hexdigest()
+        ruta = self._ruta_objeto(clave)
+        if ruta.exists():
+            os.utime(ruta)
+        else:
+            ruta.parent.mkdir(exist_ok=True)
+            temporal = ruta.with_name(f'{ruta.name}.{threading.get_ident()}.tmp')
+            temporal.write_bytes(gzip.compress(contenido, compresslevel=6))
+            os.replace(temporal, ruta)
+            if self.max_bytes:
+                if self._tamanio is None:
+                    self._tamanio = sum(p.stat().st_size for p in self._objetos.glob('*/*.gz'))
+                else:
+                    self._tamanio += ruta.stat().st_size
+                if self._tamanio > self.max_bytes:
+                    self._liberar_espacio()
+        with open(self._indice, 'a', encoding='utf-8') as f:
+            f.write(f'{pagina}\t{clave}\n')
+
+    def _liberar_espacio(self) -> None:
+        """Borramos los objetos menos usados hasta quedar en el 90% del máximo"""
+        objetos = []
+        for ruta in self._objetos.glob('*/*.gz'):
+            try:
+                estado = ruta.stat()
+            except FileNotFoundError:
+                continue
+            objetos.append((estado.st_mtime, estado.st_size, ruta))
+        objetos.sort()
+        self._tamanio = sum(tamanio for _, tamanio, _ in objetos)
+        objetivo = self.max_bytes * 0.9
+        for _, tamanio, ruta in objetos:
+            if self._tamanio <= objetivo:
+                break
+            ruta.unlink(missing_ok=True)
+            self._tamanio -= tamanio
+
+    def reiniciar(self) -> None:
+        """Vaciamos el índice de la consulta (los objetos se quedan para otras)"""
+        self._indice.unlink(missing_ok=True)
+
+    def paginas(self) -> dict[int, str]:
+        """Devuelve el hash de cada página guardada (la última versión)"""
+        if not self._indice.exists():
+            return {}
+        paginas = {}
+        with open(self._indice, encoding='utf-8') as f:
+            for linea in f:
+                pagina, clave = linea.split()
+                paginas[int(pagina)] = clave
+        return dict(sorted(paginas.items()))
+
+    def leer(self) -> Iterator[tuple[str, str]]:
+        """
+        Devolvemos (yield) las páginas guardadas de la consulta en orden,
+        con el mismo formato que los motores de descarga. Las páginas que
+        la caché ya ha eliminado se saltan con un aviso.
+        """
+        for pagina, clave in self.paginas().items():
+            ruta = self._ruta_objeto(clave)
+            try:
+                contenido = json.loads(gzip.decompress(ruta.read_bytes()))
+            except FileNotFoundError:
+                logging.warning(f'La página {pagina} ya no está en la caché')
+                continue
+            os.utime(ruta)
+            yield contenido['cabecera'], contenido['texto']
+
+def cachear_paginas(paginas:Iterable[tuple[str, str]],
+                    cache:CachePaginas | None,
+                    primera:int=1) -> Iterator[tuple[str, str]]:
+    """
+    Guardamos en la caché cada página según pasa (numeradas desde primera).
+    Si empezamos desde la primera página, olvidamos las de la descarga
+    anterior de la misma consulta.
+    """
+    if cache is not None and primera == 1:
+        cache.reiniciar()
+    for numero, (header_element, texto) in enumerate(paginas, start=primera):
+        if cache is not None:
+            cache.guardar(numero, header_element, texto)
+        yield header_element, texto
+
+def ir_a_pagina_siguiente(driver) -> bool:
+    """
+    Pasamos a la siguiente página de resultados pulsando en <<Siguiente>>.
+    Devuelve False si no hay más páginas.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoAlertPresentException
+    # Recargamos la página:
+    driver.execute_script("""
+    window.onbeforeunload = null;
+    window.addEventListener('beforeunload', e => e.stopImmediatePropagation(), true);
+    """)
+    driver.refresh()
+    try:
+        alert = driver.switch_to.alert
+        alert.accept()
+    except NoAlertPresentException:
+        pass
+    link_elements = driver.find_elements(By.CSS_SELECTOR, "td.texto a[href*='visualizar']")
+    # Solo hay dos opciones con enlace <siguiente>
+    siguientes = [element for element in link_elements if 'Siguiente' in element.text]
+    if len(siguientes) > 0:
+        siguientes[0].click()
+        del link_elements
+        return True
+    # Borramos para evitar que los threads de selenium
+    # se vuelvan locos
+    del link_elements
+    return False
+
+def leer_pagina(driver) -> dict:
+    """
+    Modo rápido: con una única llamada a execute_script obtenemos la
+    cabecera, el texto de las concordancias y el enlace a la página
+    siguiente, sin recargar la página ni buscar elementos uno a uno.
+    """
+    from selenium.common.exceptions import NoSuchElementException
+    pagina = driver.execute_script(SCRIPT_LEER_PAGINA)
+    if pagina is None:
+        raise NoSuchElementException('No se encontró el contenedor <tt> de las concordancias')
+    return pagina
+
+def seguir_enlace_siguiente(driver, pagina:dict) -> bool:
+    """
+    Modo rápido: navegamos a la página siguiente con el enlace que
+    devolvió leer_pagina. Devuelve False si no hay más páginas.
+    No esperamos un tiempo fijo sino a los eventos del navegador:
+    driver.get vuelve tras el evento load y, si el enlace es javascript,
+    esperamos a que el contenedor de la página actual desaparezca y a
+    que el <tt> de la nueva esté en el documento (si no, leer_pagina
+    podría buscarlo mientras la página aún se está cargando).
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    siguiente = pagina['siguiente']
+    if not siguiente:
+        return False
+    if siguiente.startswith('http'):
+        driver.get(siguiente)
+    else:
+        driver.execute_script("arguments[0].click();", pagina['enlace'])
+        espera = WebDriverWait(driver, 300)
+        espera.until(EC.staleness_of(pagina['contenedor']))
+        espera.until(EC.presence_of_element_located((By.TAG_NAME, 'tt')))
+    return True
+
+def avanzar_paginas(driver, paginas:int, rapido:bool=False) -> bool:
+    """
+    Saltamos las primeras páginas de resultados sin parsearlas (para
+    reanudar una descarga). Devuelve False si se acaban antes las páginas.
+    """
+    for _ in range(paginas):
+        if rapido:
+            avanza = seguir_enlace_siguiente(driver, leer_pagina(driver))
+        else:
+            avanza = ir_a_pagina_siguiente(driver)
+        if not avanza:
+            return False
+    return True
+
+def _id_anterior(id_concordancia:str, ultimo_id:str | None) -> bool:
+    """
+    Indica si una concordancia va antes (o es) la última ya descargada.
+    Los IDs son los números de concordancia, así que comparamos como enteros.
+    """
+    if ultimo_id is None:
+        return False
+    try:
+        return int(id_concordancia) <= int(ultimo_id)
+    except ValueError:
+        return id_concordancia == ultimo_id
+
+def leer_paginas_driver(driver, rapido:bool=False, saltar:int=0) -> Iterator[tuple[str, str]]:
+    """
+    Recorremos las páginas de resultados abiertas en el navegador y
+    devolvemos (yield) para cada una la cabecera y el texto del <tt>.
+    La navegación a la siguiente página se hace cuando se pide la
+    siguiente, así que quien consume puede procesar antes de seguir.
+    Con saltar > 0 se pasan esas páginas sin leerlas (al reanudar).
+    Con rapido=True cada página se lee con una sola llamada al navegador
+    y se pasa a la siguiente sin recargar (ver leer_pagina).
+    """
+    from selenium.webdriver.common.by import By
+    if saltar and not avanzar_paginas(driver, saltar, rapido):
+        # Nos quedamos en la última página: el filtro por ultimo_id
+        # evita repetir filas
+        logging.warning('La consulta tiene menos páginas que el checkpoint')
+    n = saltar
+    while True:
+        n += 1
+        if rapido:
+            # Pasos 1 y 2 en una sola llamada
+            with PERFIL.medir('lectura', n):
+                pagina = leer_pagina(driver)
+            yield pagina['cabecera'], pagina['texto']
+        else:
+            with PERFIL.medir('lectura', n):
+                # Paso 1, obtenemos el contenedor de las concordancias
+                outer_element = driver.find_element(By.TAG_NAME, "tt")
+                
+                # Paso 2, extraemos las cabeceras de los resultados
+                header_element = outer_element.find_element(By.TAG_NAME, 'b').text
+                texto = outer_element.text
+            yield header_element, texto
+        # Evaluamos la condición de salida: que no haya un botón de Siguiente
+        with PERFIL.medir('navegacion', n):
+            if rapido:
+                avanza = seguir_enlace_siguiente(driver, pagina)
+            else:
+                avanza = ir_a_pagina_siguiente(driver)
+        if not avanza:
+            break
+
+def _parsear_pagina(header_element:str,
+                    texto:str,
+                    pagina:int | None = None) -> tuple[list[str], list[list[str]]]:
+    """
+    Pasos 3 y 4: separamos la cabecera del texto de una página y parseamos
+    todas sus concordancias. Devolvemos las cabeceras y las concordancias.
+    """
+    with PERFIL.medir('parseo', pagina):
+        headers = REGEX_ESPACIOS.sub(' ', header_element).split(' ')
+        
+        # Paso 3, extraemos el texto de las concordancias MENOS el de los títulos
+        concords = texto.replace(header_element, '').split('\n')
+
+        # Paso 4, procesamos todas las concordancias de la página de una vez
+        return headers, parsear_concordancias(concords)
+
+def _parsear_paginas(paginas:list[tuple[str, str]]) -> list[tuple[tuple[list[str], list[list[str]]], float]]:
+    """
+    Parseamos un lote de páginas (en un proceso del pipeline). Con cada
+    página devolvemos lo que ha tardado en parsearse: el perfil de los
+    procesos del pool no está activo, así que se anota en el principal.
+    """
+    parseadas = []
+    for header_element, texto in paginas:
+        inicio = time.perf_counter()
+        parseadas.append((_parsear_pagina(header_element, texto), time.perf_counter() - inicio))
+    return parseadas
+
+# Marca el final de las páginas en la cola de LecturaEnSegundoPlano
+_FIN_PAGINAS = object()
+
+class LecturaEnSegundoPlano:
+    """
+    Etapa de lectura del pipeline: recorremos las páginas (del navegador o
+    del motor HTTP) en un hilo y las dejamos en una cola acotada, de forma
+    que la siguiente página se va cargando mientras se parsea y se escribe
+    la anterior. Si la cola se llena la lectura espera (contrapresión).
+    Un error en la lectura se relanza al sacar la página que no se pudo leer.
+    """
+
+    def __init__(self, paginas:Iterable[tuple[str, str]], max_paginas:int=16):
+        self.cola = queue.Queue(maxsize=max_paginas)
+        self.terminada = False
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._leer, args=(paginas,), daemon=True)
+        self._hilo.start()
+
+    def _poner(self, elemento) -> bool:
+        while not self._parar.is_set():
+            try:
+                self.cola.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _leer(self, paginas:Iterable[tuple[str, str]]) -> None:
+        try:
+            for pagina in paginas:
+                if not self._poner(pagina):
+                    return
+        except Exception as e:
+            self._poner(e)
+        else:
+            self._poner(_FIN_PAGINAS)
+
+    def sacar(self, bloquear:bool=True) -> tuple[str, str] | None:
+        """
+        Devolvemos la siguiente página, o None si ya no hay más.
+        Sin bloquear, lanza queue.Empty si la página aún no se ha leído.
+        """
+        if self.terminada:
+            return None
+        elemento = self.cola.get(block=bloquear)
+        if elemento is _FIN_PAGINAS:
+            self.terminada = True
+            return None
+        if isinstance(elemento, Exception):
+            self.terminada = True
+            raise elemento
+        return elemento
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        while (pagina := self.sacar()) is not None:
+            yield pagina
+
+    def detener(self) -> None:
+        self._parar.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.detener()
+
+def canalizar_paginas(paginas:Iterable[tuple[str, str]],
+                      procesos:int=0,
+                      max_paginas:int=16,
+                      paginas_por_lote:int=8,
+                      primera:int=1) -> Iterator[tuple[list[str], list[list[str]]]]:
+    """
+    Pipeline de lectura y parseo: las páginas se leen en un hilo
+    (LecturaEnSegundoPlano) y, con procesos > 0, se parsean por lotes en un
+    pool de procesos mientras quien consume (la escritura) va guardando
+    las anteriores. Las colas están acotadas: como mucho max_paginas
+    leídas sin parsear y 2 * procesos lotes en el pool.
+    Devolvemos (yield) las cabeceras y las concordancias de cada página
+    en su orden original. Con procesos=0 se parsea en este proceso.
+    En el perfil, el parseo de cada página se anota con su número
+    (empezando en primera) y espera_parseo es el tiempo que la escritura
+    ha estado esperando a los procesos.
+    """
+    with LecturaEnSegundoPlano(paginas, max_paginas) as lectura:
+        if not procesos:
+            for pagina, (header_element, texto) in enumerate(lectura, start=primera):
+                yield _parsear_pagina(header_element, texto, pagina)
+            return
+        numero = primera
+        pendientes = deque()
+        error = None
+        # spawn: no podemos hacer fork con el hilo de lectura en marcha
+        with ProcessPoolExecutor(procesos, mp_context=multiprocessing.get_context('spawn')) as pool:
+            while pendientes or not (lectura.terminada or error):
+                lote = []
+                if len(pendientes) < 2 * procesos:
+                    try:
+                        # Solo esperamos a la lectura si no hay nada que devolver
+                        while len(lote) < paginas_por_lote:
+                            pagina = lectura.sacar(bloquear=not pendientes and not lote)
+                            if pagina is None:
+                                break
+                            lote.append(pagina)
+                    except queue.Empty:
+                        pass
+                    except Exception as e:
+                        # Antes de relanzarlo devolvemos las páginas ya leídas
+                        error = e
+                    if lote:
+                        pendientes.append(pool.submit(_parsear_paginas, lote))
+                if pendientes and (not lote or pendientes[0].done() or len(pendientes) >= 2 * procesos):
+                    with PERFIL.medir('espera_parseo'):
+                        parseadas = pendientes.popleft().result()
+                    for parseada, segundos in parseadas:
+                        PERFIL.anotar('parseo', segundos, numero)
+                        numero += 1
+                        yield parseada
+        if error is not None:
+            raise error
+
+def concordancias_de_paginas(paginas:Iterable[tuple[str, str]],
+                             claves_conocidas:set[str] | None = None,
+                             ultimo_id:str | None = None,
+                             primera:int=1,
+                             procesos:int | None = None) -> Iterator[list[dict]]:
+    """
+    Convertimos cada página (cabecera y texto del <tt>) en la lista de
+    concordancias de esa página. Es común a todos los motores de descarga.
+    Si se pasan claves_conocidas (las huellas del índice de una ejecución
+    anterior, ver clave_concordancia) esas concordancias se saltan y no se
+    devuelven. Lo mismo ocurre con las que van hasta el número ultimo_id
+    (al reanudar la misma consulta desde un checkpoint).
+    primera es el número de la primera página (solo para el perfil).
+    Con procesos (0 o más) la lectura, el parseo y la escritura se solapan
+    (ver canalizar_paginas).
     Para cada concordancia extraemos un diccionario tal que:
     {
         n: Número
@@ -232,6 +996,67 @@ def extraer_concordancias(driver):
         tema: Tema
     }
     """
+    # Tenemos que guardar el ID de cada concordancia vista en esta ejecución
+    # en un conjunto para que la comprobación sea O(1)
+    id_concordancias = set()
+    claves_conocidas = claves_conocidas or set()
+    omitidas = 0
+    if procesos is None:
+        parseadas = (_parsear_pagina(header_element, texto, pagina)
+                     for pagina, (header_element, texto) in enumerate(paginas, start=primera))
+    else:
+        parseadas = canalizar_paginas(paginas, procesos, primera=primera)
+    for headers, processed_concords in parseadas:
+        clean_concords = []
+        omitidas_pagina = 0
+        for processed in processed_concords:
+            # Extraemos el primer elemento, que es el número/ID
+            # si el ID no existe:
+            #     guardamos el ID y la propia concordancia
+            # si el ID SÍ existe salimos de este bucle y no procesamos
+            # más
+            # si el ID ya se descargó en otra ejecución lo saltamos
+            if processed[0] in id_concordancias:
+                break
+            id_concordancias.add(processed[0])
+            if _id_anterior(processed[0], ultimo_id) or (
+                    claves_conocidas and clave_concordancia(*processed[1:5]) in claves_conocidas):
+                omitidas_pagina += 1
+            else:
+                clean_concords.append(processed)
+        omitidas += omitidas_pagina
+        
+        # Paso 5, creamos un diccionario con cada uno de los resultados
+        filas = [{header:att for header,att in zip_longest(headers, clean_concord, fillvalue='_')}
+                 for clean_concord in clean_concords]
+        PERFIL.contar('paginas')
+        PERFIL.contar('filas_parseadas', len(processed_concords))
+        PERFIL.contar('filas_omitidas', omitidas_pagina)
+        PERFIL.contar('filas_duplicadas', len(processed_concords) - len(clean_concords) - omitidas_pagina)
+        PERFIL.contar('filas_devueltas', len(filas))
+        # y devolvemos los de esta página
+        yield filas
+    if omitidas:
+        logging.info(f'Se han omitido {omitidas} concordancias ya descargadas')
+
+def iterar_concordancias(driver,
+                         claves_conocidas:set[str] | None = None,
+                         ultimo_id:str | None = None,
+                         rapido:bool=False,
+                         saltar:int=0,
+                         cache:CachePaginas | None = None,
+                         procesos:int | None = None) -> Iterator[list[dict]]:
+    """
+    Recorremos todas las páginas de resultados del navegador y devolvemos
+    (yield) las concordancias de cada página en cuanto están parseadas,
+    de forma que quien consuma el generador puede ir escribiéndolas sin
+    acumularlas (ver concordancias_de_paginas y leer_paginas_driver).
+    Si se pasa una caché, cada página leída se guarda en ella.
+    Con procesos, el navegador carga la página siguiente mientras se
+    parsea y escribe la anterior (ver canalizar_paginas).
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import Select
     # El primer paso es asegurarnos de que de verdad nos encontramos
     # en una página que recupera Concordancias y no Documentos, por ejemplo
     dropdown = driver.find_element(By.CSS_SELECTOR, "select[name='tipo1']")
@@ -242,98 +1067,1257 @@ def extraer_concordancias(driver):
     if 'Concordancias' not in selected.strip():
         # Validamos el string
         raise ValueError('La página en la que nos encontramos no tiene concordancias')
-    result = []
-    # Tenemos que guardar un listado del ID de la concordancia
-    id_concordancias = []
-    # Iniciamos un bucle infinito:
+    paginas = cachear_paginas(leer_paginas_driver(driver, rapido, saltar), cache, saltar + 1)
+    yield from concordancias_de_paginas(paginas, claves_conocidas, ultimo_id, saltar + 1, procesos)
+
+def crear_sesion(conexiones:int=4) -> requests.Session:
+    """
+    Creamos una sesión de requests con un pool de conexiones keep-alive
+    y reintentos con espera exponencial para los errores del servidor
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    if conexiones < 1:
+        raise ValueError('Hace falta al menos una conexión')
+    sesion = requests.Session()
+    reintentos = Retry(total=3, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504],
+                       allowed_methods=None)
+    adaptador = HTTPAdapter(pool_connections=conexiones, pool_maxsize=conexiones, max_retries=reintentos)
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+    sesion.headers['User-Agent'] = USER_AGENT
+    return sesion
+
+def parsear_pagina_html(html:str | bytes, url:str) -> tuple[str, str, str | None]:
+    """
+    Extraemos de una página de resultados la cabecera y el texto del <tt>
+    (igual que los devolvería el navegador) y la URL de la página
+    siguiente, o None si es la última.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, PARSER_HTML)
+    contenedor = soup.find('tt')
+    if contenedor is None:
+        raise ValueError('La página no tiene el contenedor <tt> de las concordancias')
+    # El navegador convierte los <br> en saltos de línea y los &nbsp; en espacios
+    for salto in contenedor.find_all('br'):
+        salto.replace_with('\n')
+    cabecera = contenedor.find('b')
+    header_element = cabecera.get_text().replace('\xa0', ' ') if cabecera else ''
+    texto = contenedor.get_text().replace('\xa0', ' ')
+    siguiente = None
+    for enlace in soup.select("td.texto a[href*='visualizar']"):
+        if 'Siguiente' in enlace.get_text():
+            siguiente = urljoin(url, enlace['href'])
+            break
+    if siguiente and not siguiente.startswith('http'):
+        raise ValueError(f'El enlace a la página siguiente no se puede seguir sin navegador: {siguiente}')
+    return header_element, texto, siguiente
+
+class LimitadorPeticiones:
+    """
+    Limita el ritmo de peticiones al servidor, compartido entre todos los
+    hilos: cada petición espera su turno para no superar
+    peticiones_por_segundo. Con None no se limita.
+    """
+
+    def __init__(self, peticiones_por_segundo:float | None = None):
+        self.intervalo = 1 / peticiones_por_segundo if peticiones_por_segundo else 0
+        self._siguiente = 0.0
+        self._lock = threading.Lock()
+
+    def esperar(self) -> None:
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self.intervalo
+        time.sleep(turno - ahora)
+
+def deducir_paginacion(url_actual:str, url_siguiente:str, pagina:int) -> Callable[[int], str] | None:
+    """
+    Comparamos las URLs de dos páginas consecutivas (pagina y pagina + 1)
+    para encontrar el parámetro numérico que avanza con cada página.
+    Devuelve una función que da la URL de cualquier página, o None si
+    no hay exactamente un parámetro que cambie.
+    """
+    actual, siguiente = urlsplit(url_actual), urlsplit(url_siguiente)
+    if actual[:3] != siguiente[:3]:
+        return None
+    params_actual = parse_qsl(actual.query, keep_blank_values=True)
+    params_siguiente = parse_qsl(siguiente.query, keep_blank_values=True)
+    if [k for k, _ in params_actual] != [k for k, _ in params_siguiente]:
+        return None
+    distintos = [i for i, (a, b) in enumerate(zip(params_actual, params_siguiente)) if a != b]
+    if len(distintos) != 1:
+        return None
+    i = distintos[0]
+    try:
+        valor, paso = int(params_actual[i][1]), int(params_siguiente[i][1]) - int(params_actual[i][1])
+    except ValueError:
+        return None
+
+    def url_pagina(n:int) -> str:
+        params = list(params_actual)
+        params[i] = (params[i][0], str(valor + (n - pagina) * paso))
+        return urlunsplit(actual._replace(query=urlencode(params)))
+    return url_pagina
+
+def _descargar_pagina(sesion:requests.Session,
+                      url:str,
+                      limitador:LimitadorPeticiones,
+                      timeout:float,
+                      pagina:int | None = None) -> tuple[str, str, str | None]:
+    """
+    Pedimos una página respetando el límite de peticiones y la parseamos
+    """
+    limitador.esperar()
+    with PERFIL.medir('descarga', pagina):
+        respuesta = sesion.get(url, timeout=timeout)
+        respuesta.raise_for_status()
+    with PERFIL.medir('html', pagina):
+        return parsear_pagina_html(respuesta.content, respuesta.url)
+
+def _leer_paginas_concurrente(sesion:requests.Session,
+                              url_pagina:Callable[[int], str],
+                              primera:int,
+                              concurrencia:int,
+                              limitador:LimitadorPeticiones,
+                              timeout:float) -> Iterator[tuple[str, str]]:
+    """
+    Pedimos las páginas desde primera en paralelo, con como mucho
+    concurrencia peticiones en vuelo, y las devolvemos en su orden
+    original aunque lleguen desordenadas. Paramos en la primera página
+    sin <<Siguiente>>; las que se hubieran pedido después se descartan.
+    """
+    pool = ThreadPoolExecutor(max_workers=concurrencia)
+    en_vuelo = {}
+    por_pedir = primera
+    try:
+        while True:
+            while len(en_vuelo) < concurrencia:
+                en_vuelo[por_pedir] = pool.submit(_descargar_pagina, sesion, url_pagina(por_pedir),
+                                                  limitador, timeout, por_pedir)
+                por_pedir += 1
+            header_element, texto, siguiente = en_vuelo.pop(primera).result()
+            yield header_element, texto
+            if siguiente is None:
+                break
+            primera += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def leer_paginas_http(consulta:dict,
+                      sesion:requests.Session | None = None,
+                      saltar:int=0,
+                      timeout:float=60,
+                      concurrencia:int=1,
+                      peticiones_por_segundo:float | None = None) -> Iterator[tuple[str, str]]:
+    """
+    Motor sin navegador: enviamos el formulario de búsqueda del CORDE
+    tal y como lo haría el navegador y seguimos los enlaces <<Siguiente>>.
+    La consulta es un diccionario con:
+    {
+        url: URL a la que se envía el formulario (su atributo action)
+        metodo: 'post' o 'get' (por defecto 'post')
+        parametros: campos del formulario
+    }
+    Devuelve (yield) la cabecera y el texto del <tt> de cada página.
+    Con concurrencia > 1, en cuanto conocemos los enlaces de dos páginas
+    seguidas deducimos la URL de las demás (ver deducir_paginacion) y las
+    pedimos en paralelo; si no se puede, seguimos en serie.
+    """
+    sesion = sesion or crear_sesion(concurrencia)
+    limitador = LimitadorPeticiones(peticiones_por_segundo)
+    limitador.esperar()
+    with PERFIL.medir('descarga', 1):
+        respuesta = sesion.request(consulta.get('metodo', 'post').upper(), consulta['url'],
+                                   data=consulta.get('parametros'), timeout=timeout)
+    pagina = 0
+    url_actual = None
     while True:
-        # Paso 1, obtenemos el contenedor de las concordancias
-        outer_element = driver.find_element(By.TAG_NAME, "tt")
-        
-        # Paso 2, extraemos las cabeceras de los resultados
-        header_element = outer_element.find_element(By.TAG_NAME, 'b').text
-        headers = re.sub('\s+', ' ', header_element).split(' ')
-        
-        # Paso 3, extraemos el texto de las concordancias MENOS el de los títulos
-        concords = outer_element.text.replace(header_element, '').split('\n')
+        respuesta.raise_for_status()
+        pagina += 1
+        with PERFIL.medir('html', pagina):
+            header_element, texto, siguiente = parsear_pagina_html(respuesta.content, respuesta.url)
+        if pagina > saltar:
+            yield header_element, texto
+        if siguiente is None:
+            break
+        if concurrencia > 1 and url_actual is not None:
+            url_pagina = deducir_paginacion(url_actual, siguiente, pagina)
+            if url_pagina is not None:
+                desde = max(pagina + 1, saltar + 1)
+                if desde > pagina + 1:
+                    # Al reanudar nos saltamos directamente las páginas ya
+                    # descargadas, pero antes comprobamos que la última de
+                    # ellas tiene <<Siguiente>>: si no, no queda ninguna
+                    *_, siguiente_saltada = _descargar_pagina(sesion, url_pagina(saltar), limitador,
+                                                              timeout, saltar)
+                    if siguiente_saltada is None:
+                        break
+                yield from _leer_paginas_concurrente(sesion, url_pagina, desde,
+                                                     concurrencia, limitador, timeout)
+                break
+            logging.warning('No se pudo deducir la paginación: las páginas se piden en serie')
+            concurrencia = 1
+        url_actual = siguiente
+        limitador.esperar()
+        with PERFIL.medir('descarga', pagina + 1):
+            respuesta = sesion.get(siguiente, timeout=timeout)
 
-        # Paso 4, procesamos cada concordancia
-        clean_concords = []
-        for concord in concords:
-            processed = parsear_concordancia(concord)
-            if processed is not None and len(processed)>1:
-                # Después de garantizar que la concordancia es una lista
-                # extraemos el primer elemento, que es el número/ID
-                # si el ID no existe:
-                #     guardamos el ID y la propia concordancia
-                # si el ID SÍ existe salimos de este bucle y no procesamos
-                # más
-                if processed[0] not in id_concordancias:
-                    id_concordancias.append(processed[0])
-                    clean_concords.append(processed)
-                else:
-                    break
+def iterar_concordancias_http(consulta:dict,
+                              claves_conocidas:set[str] | None = None,
+                              ultimo_id:str | None = None,
+                              saltar:int=0,
+                              sesion:requests.Session | None = None,
+                              concurrencia:int=1,
+                              peticiones_por_segundo:float | None = None,
+                              cache:CachePaginas | None = None,
+                              procesos:int | None = None) -> Iterator[list[dict]]:
+    """
+    Igual que iterar_concordancias pero con el motor HTTP (sin navegador)
+    """
+    paginas = leer_paginas_http(consulta, sesion, saltar,
+                                concurrencia=concurrencia,
+                                peticiones_por_segundo=peticiones_por_segundo)
+    paginas = cachear_paginas(paginas, cache, saltar + 1)
+    yield from concordancias_de_paginas(paginas, claves_conocidas, ultimo_id, saltar + 1, procesos)
+
+class BufferConcordancias:
+    """
+    Acumula las concordancias por columnas (una lista por columna) en
+    lugar de guardar un diccionario por concordancia, y comparte los
+    textos repetidos de las columnas categóricas (autor, título, país...)
+    en vez de guardar una copia por fila.
+    Se comporta como una secuencia de filas (len e iteración devuelven
+    diccionarios, creados solo al pedirlos) y a_dataframe construye el
+    DataFrame directamente desde las columnas.
+    """
+
+    def __init__(self, filas:Iterable[dict] = ()):
+        self.columnas = []
+        self._datos = {}
+        self._compartidos = {}
+        self._n = 0
+        self.extend(filas)
+
+    def _nueva_columna(self, columna) -> None:
+        self.columnas.append(columna)
+        # Como en DataFrame.from_records, las filas anteriores quedan vacías
+        self._datos[columna] = [None] * self._n
+        if _es_categorica(columna):
+            self._compartidos[columna] = {}
+
+    def extend(self, filas:Iterable[dict]) -> None:
+        for fila in filas:
+            for columna in fila:
+                if columna not in self._datos:
+                    self._nueva_columna(columna)
+            for columna, valores in self._datos.items():
+                valor = fila.get(columna)
+                compartidos = self._compartidos.get(columna)
+                if compartidos is not None:
+                    valor = compartidos.setdefault(valor, valor)
+                valores.append(valor)
+            self._n += 1
+
+    def claves(self) -> Iterator[str]:
+        """Devuelve las huellas de las concordancias para el índice (ver clave_concordancia)"""
+        return (clave_fila(fila) for fila in self)
+
+    def a_dataframe(self) -> pd.DataFrame:
+        import pandas as pd
+        return pd.DataFrame(self._datos, columns=self.columnas)
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(self._n):
+            yield {columna: valores[i] for columna, valores in self._datos.items()}
+
+@PERFIL.medido('extraccion')
+def extraer_concordancias(driver,
+                          claves_conocidas:set[str] | None = None,
+                          rapido:bool=False) -> BufferConcordancias:
+    """
+    Vamos a extraer todas las concordancias que se han extraído para un 
+    mismo resultado y las devolvemos juntas en un BufferConcordancias
+    (ver iterar_concordancias).
+    """
+    result = BufferConcordancias()
+    for filas in iterar_concordancias(driver, claves_conocidas, rapido=rapido):
+        result.extend(filas)
+    return result
+
+def _nombre_salida(consulta:str | None = None) -> str:
+    """
+    Nombre (sin extensión) del fichero de salida: la fecha y hora actual
+    y el nombre de la consulta, si lo tiene, para que varias consultas no
+    se pisen
+    """
+    file_name = datetime.now().strftime("%Y-%m-%d_%H-%M")
+    if consulta:
+        file_name += '_' + _nombre_consulta(consulta)
+    return file_name
+
+def _ruta_salida(extension:str, output_path:Path, consulta:str | None = None) -> Path:
+    """
+    Crearemos una carpeta con los resultados de hoy y devolvemos la ruta
+    del fichero de salida (ver _nombre_salida)
+    """
+    today_str = date.today().strftime("%d-%m-%Y") 
+    final_path = output_path / 'results' / today_str
+    final_path.mkdir(parents=True, exist_ok=True)
+    return final_path / (_nombre_salida(consulta) + extension)
+
+class EscritorResultados(ABC):
+    """
+    Escritor incremental: recibe las filas de cada página (escribir) y
+    las vuelca al fichero según llegan, de modo que la memoria no crece
+    con el tamaño de la consulta.
+    Las columnas se fijan con la primera fila.
+    Si se pasa un checkpoint (punto) se mantienen sus columnas y la
+    numeración de filas continúa donde se quedó.
+    """
+    extension = ''
+    # Indica si lo escrito queda en disco tras cada página
+    duradero = False
+
+    def __init__(self, output_path:Path, punto:dict | None = None, consulta:str | None = None):
+        self.ruta = self._ruta(output_path, consulta)
+        self.columnas = punto.get('columnas') if punto else None
+        self.filas_escritas = punto.get('filas_escritas', 0) if punto else 0
+        # Si el fichero no se puede ampliar, al reanudar creamos otro que
+        # indica desde qué fila continúa
+        if punto and punto.get('salida') and not self.duradero:
+            salida = Path(punto['salida'])
+            self.ruta = salida.with_name(f"{salida.stem}_desde_{self.filas_escritas}{self.extension}")
+
+    def _ruta(self, output_path:Path, consulta:str | None) -> Path:
+        """Fichero en el que se escriben los resultados"""
+        return _ruta_salida(self.extension, output_path, consulta)
+
+    @abstractmethod
+    def escribir(self, filas:list[dict]) -> None:
+        """Escribe las filas de una página"""
+
+    def cerrar(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+class EscritorFilas(EscritorResultados):
+    """
+    Escritor que vuelca las filas una a una (csv y excel). Como hace
+    pandas, la primera columna es el índice de la fila.
+    """
+
+    def __init__(self, output_path:Path, punto:dict | None = None, consulta:str | None = None):
+        super().__init__(output_path, punto, consulta)
+        self._con_cabecera = False
+
+    def escribir(self, filas:list[dict]) -> None:
+        if not filas:
+            return
+        if self.columnas is None:
+            self.columnas = list(filas[0].keys())
+        if not self._con_cabecera:
+            self._escribir_fila(['', *self.columnas])
+            self._con_cabecera = True
+        for fila in filas:
+            self._escribir_fila([self.filas_escritas, *(fila.get(columna, '_') for columna in self.columnas)])
+            self.filas_escritas += 1
+        self._volcar()
+
+    @abstractmethod
+    def _escribir_fila(self, valores:list) -> None:
+        """Escribe una fila (la cabecera o una concordancia)"""
+
+    def _volcar(self) -> None:
+        pass
+
+class EscritorCSV(EscritorFilas):
+    """
+    Añade las filas al CSV y hace flush tras cada página: si la ejecución
+    se interrumpe, lo ya descargado queda en disco.
+    """
+    extension = '.csv'
+    duradero = True
+
+    def __init__(self, output_path:Path, punto:dict | None = None, consulta:str | None = None):
+        super().__init__(output_path, punto, consulta)
+        modo = 'w'
+        # Al reanudar seguimos escribiendo al final del mismo CSV
+        if punto and punto.get('salida') and Path(punto['salida']).exists():
+            self.ruta = Path(punto['salida'])
+            self._con_cabecera = self.columnas is not None
+            modo = 'a'
+        self._fichero = open(self.ruta, modo, newline='', encoding='utf-8')
+        self._csv = csv.writer(self._fichero)
+
+    def _escribir_fila(self, valores:list) -> None:
+        self._csv.writerow(valores)
+
+    def _volcar(self) -> None:
+        self._fichero.flush()
+
+    def cerrar(self) -> None:
+        self._fichero.close()
+
+class EscritorExcel(EscritorFilas):
+    """
+    Usa un libro de openpyxl en modo write-only, que va escribiendo las
+    filas en un temporal en lugar de mantenerlas en memoria. El .xlsx
+    solo queda completo al cerrar el escritor y no se puede ampliar: al
+    reanudar se crea un fichero nuevo.
+    Al llegar al límite de filas de Excel se continúa en otra hoja
+    (Sheet2, Sheet3...) repitiendo la cabecera.
+    """
+    extension = '.xlsx'
+
+    def __init__(self, output_path:Path, punto:dict | None = None, consulta:str | None = None):
+        super().__init__(output_path, punto, consulta)
+        from openpyxl import Workbook
+        self._libro = Workbook(write_only=True)
+        self._hojas = 0
+        self._nueva_hoja()
+
+    def _nueva_hoja(self) -> None:
+        self._hojas += 1
+        self._hoja = self._libro.create_sheet(f'Sheet{self._hojas}')
+        self._filas_hoja = 0
+
+    def _escribir_fila(self, valores:list) -> None:
+        if self._filas_hoja > LIMITE_FILAS_EXCEL:
+            self._nueva_hoja()
+            self._hoja.append(['', *self.columnas])
+            self._filas_hoja += 1
+        self._hoja.append(valores)
+        self._filas_hoja += 1
+
+    def cerrar(self) -> None:
+        self._libro.save(self.ruta)
+
+def _normalizar_columna(columna:str) -> str:
+    """Nombre de una columna sin tildes, espacios alrededor ni mayúsculas"""
+    return unicodedata.normalize('NFKD', str(columna)).encode('ascii', 'ignore').decode().strip().lower()
+
+def _es_categorica(columna:str) -> bool:
+    """
+    Indica si una columna se repite tanto que merece guardarse como
+    categórica (codificada como diccionario)
+    """
+    return _normalizar_columna(columna) in COLUMNAS_CATEGORICAS
+
+class EscritorColumnar(EscritorResultados):
+    """
+    Escritor para formatos columnares (Parquet y Feather). Las filas se
+    acumulan por columnas y se escriben en grupos de filas_por_grupo, así
+    que la memoria no depende del tamaño de la consulta.
+    Las columnas que se repiten mucho (autor, título, país, tema, fecha)
+    se codifican como diccionario con un único diccionario por columna
+    para todo el fichero: al leerlas con pandas son categóricas.
+    A diferencia de csv y excel no se guarda la columna del índice.
+    """
+    filas_por_grupo = FILAS_POR_GRUPO
+
+    def __init__(self, output_path:Path, punto:dict | None = None, consulta:str | None = None):
+        super().__init__(output_path, punto, consulta)
+        self._escritor = None
+        self._esquema = None
+        self._buffer = None
+        self._diccionarios = {}
+
+    def escribir(self, filas:list[dict]) -> None:
+        if not filas:
+            return
+        if self.columnas is None:
+            self.columnas = list(filas[0].keys())
+        if self._buffer is None:
+            self._buffer = {columna: [] for columna in self.columnas}
+        for columna, valores in self._buffer.items():
+            valores.extend(fila.get(columna, '_') for fila in filas)
+        self.filas_escritas += len(filas)
+        if len(self._buffer[self.columnas[0]]) >= self.filas_por_grupo:
+            self._escribir_grupo()
+
+    def _escribir_grupo(self) -> None:
+        import pyarrow as pa
+        if not self._buffer or not self._buffer[self.columnas[0]]:
+            return
+        if self._esquema is None:
+            tipo_categorico = pa.dictionary(pa.int32(), pa.string())
+            self._esquema = pa.schema([(str(columna), tipo_categorico if _es_categorica(columna) else pa.string())
+                                       for columna in self.columnas])
+            self._diccionarios = {columna: {} for columna in self.columnas if _es_categorica(columna)}
+        arrays = []
+        for columna in self.columnas:
+            valores = self._buffer[columna]
+            if columna in self._diccionarios:
+                # El diccionario solo crece: cada grupo amplía el anterior
+                diccionario = self._diccionarios[columna]
+                codigos = [diccionario.setdefault(valor, len(diccionario)) for valor in valores]
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(codigos, pa.int32()),
+                                                             pa.array(list(diccionario), pa.string())))
             else:
-                pass
-        
-        # Paso 5, creamos un diccionario con cada uno de los resultados
-        # Y cada resultado lo incluimos en la lista que sera nuestro resultado final 
-        for clean_concord in clean_concords:
-            result.append({header:att for header,att in zip_longest(headers, clean_concord, fillvalue='_')})
-        # Evaluamos la condición de salida: que no haya un botón de Siguiente
-        # Recargamos la página:
-        driver.execute_script("""
-        window.onbeforeunload = null;
-        window.addEventListener('beforeunload', e => e.stopImmediatePropagation(), true);
-        """)
-        driver.refresh()
-        try:
-            alert = driver.switch_to.alert
-            alert.accept()
-        except NoAlertPresentException:
-            pass
-        link_elements = driver.find_elements(By.CSS_SELECTOR, "td.texto a[href*='visualizar']")
-        # Solo hay dos opciones con enlace <siguiente>
-        siguientes = [element for element in link_elements if 'Siguiente' in element.text]
-        if len(siguientes) > 0:
-            siguientes[0].click()
-            del link_elements
+                arrays.append(pa.array(valores, pa.string()))
+            valores.clear()
+        lote = pa.record_batch(arrays, schema=self._esquema)
+        if self._escritor is None:
+            self._escritor = self._abrir(self._esquema)
+        self._escritor.write_batch(lote)
+
+    @abstractmethod
+    def _abrir(self, esquema:pa.Schema):
+        """Abre el escritor de pyarrow del formato con el esquema de las columnas"""
+
+    def cerrar(self) -> None:
+        self._escribir_grupo()
+        if self._escritor is not None:
+            self._escritor.close()
+
+class EscritorParquet(EscritorColumnar):
+    """
+    Cada grupo de filas se escribe como un row group de Parquet
+    """
+    extension = '.parquet'
+
+    def _abrir(self, esquema:pa.Schema):
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(self.ruta, esquema, compression='zstd')
+
+class EscritorFeather(EscritorColumnar):
+    """
+    Feather (formato IPC de Arrow) con un record batch por grupo de filas
+    """
+    extension = '.feather'
+
+    def _abrir(self, esquema:pa.Schema):
+        import pyarrow as pa
+        opciones = pa.ipc.IpcWriteOptions(compression='lz4', emit_dictionary_deltas=True)
+        return pa.ipc.new_file(str(self.ruta), esquema, options=opciones)
+
+# Base de datos local: una tabla con todas las concordancias descargadas,
+# un índice FTS5 sobre el texto (que se mantiene con los triggers) e
+# índices B-tree sobre las columnas por las que se filtra
+ESQUEMA_BD = """
+CREATE TABLE IF NOT EXISTS concordancias (
+    id INTEGER PRIMARY KEY,
+    consulta TEXT NOT NULL,
+    numero TEXT,
+    concordancia TEXT,
+    fecha TEXT,
+    anio INTEGER,
+    autor TEXT,
+    titulo TEXT,
+    pais TEXT,
+    tema TEXT,
+    publicacion TEXT,
+    UNIQUE (consulta, numero)
+);
+CREATE INDEX IF NOT EXISTS concordancias_autor ON concordancias (autor);
+CREATE INDEX IF NOT EXISTS concordancias_fecha ON concordancias (fecha);
+CREATE INDEX IF NOT EXISTS concordancias_anio ON concordancias (anio);
+CREATE INDEX IF NOT EXISTS concordancias_pais ON concordancias (pais);
+CREATE INDEX IF NOT EXISTS concordancias_tema ON concordancias (tema);
+CREATE VIRTUAL TABLE IF NOT EXISTS concordancias_fts USING fts5(
+    concordancia, content='concordancias', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS concordancias_ai AFTER INSERT ON concordancias BEGIN
+    INSERT INTO concordancias_fts (rowid, concordancia) VALUES (new.id, new.concordancia);
+END;
+CREATE TRIGGER IF NOT EXISTS concordancias_ad AFTER DELETE ON concordancias BEGIN
+    INSERT INTO concordancias_fts (concordancias_fts, rowid, concordancia) VALUES ('delete', old.id, old.concordancia);
+END;
+CREATE TRIGGER IF NOT EXISTS concordancias_au AFTER UPDATE ON concordancias BEGIN
+    INSERT INTO concordancias_fts (concordancias_fts, rowid, concordancia) VALUES ('delete', old.id, old.concordancia);
+    INSERT INTO concordancias_fts (rowid, concordancia) VALUES (new.id, new.concordancia);
+END;
+"""
+
+def ruta_base_datos(output_path:Path) -> Path:
+    """La base de datos local está en el directorio de salida"""
+    return output_path / 'concordancias.sqlite'
+
+def abrir_base_datos(ruta:Path) -> sqlite3.Connection:
+    """
+    Abrimos (y si no existe, creamos) la base de datos local
+    """
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    conexion = sqlite3.connect(ruta)
+    conexion.execute('PRAGMA journal_mode=WAL')
+    conexion.executescript(ESQUEMA_BD)
+    return conexion
+
+def _columnas_bd(columnas:list[str]) -> list[str | None]:
+    """
+    Relacionamos cada columna de los resultados con la de la base de
+    datos por su nombre (Número, Título...) o, si no lo reconocemos,
+    por su posición
+    """
+    nombres = list(COLUMNAS_BD)
+    relacion = []
+    for i, columna in enumerate(columnas):
+        normalizada = _normalizar_columna(columna)
+        if normalizada in COLUMNAS_BD:
+            relacion.append(normalizada)
         else:
-            # Borramos para evitar que los threads de selenium
-            # se vuelvan locos
-            del link_elements
-            break
-    return result
+            relacion.append(nombres[i] if i < len(nombres) else None)
+    return relacion
+
+def ingerir_filas(conexion:sqlite3.Connection,
+                  filas:Iterable[dict],
+                  consulta:str,
+                  columnas:list[str] | None = None) -> int:
+    """
+    Guardamos filas de resultados (diccionarios como los del streaming)
+    en la base de datos local. Las concordancias que ya estaban (misma
+    consulta y número) se ignoran. Devuelve las filas nuevas.
+    """
+    filas = iter(filas)
+    primera = next(filas, None)
+    if primera is None:
+        return 0
+    columnas = columnas or list(primera.keys())
+    destino = _columnas_bd(columnas)
+    pares = [(columna, nombre) for columna, nombre in zip(columnas, destino) if nombre]
+    nombres = [nombre for _, nombre in pares]
+    columna_fecha = next((columna for columna, nombre in pares if nombre == 'fecha'), None)
+
+    def valores(fila:dict) -> tuple:
+        anio = REGEX_ANIO.search(str(fila.get(columna_fecha) or '')) if columna_fecha else None
+        return (consulta, *(fila.get(columna) for columna, _ in pares), int(anio.group(0)) if anio else None)
+
+    sql = (f"INSERT OR IGNORE INTO concordancias (consulta, {', '.join(nombres)}, anio) "
+           f"VALUES ({', '.join('?' * (len(nombres) + 2))})")
+    with conexion:
+        cursor = conexion.executemany(sql, (valores(fila) for fila in chain([primera], filas)))
+    return cursor.rowcount
+
+def ingerir_fichero(ruta:Path,
+                    output_path:Path=Path(__file__).resolve().parent,
+                    consulta:str | None = None) -> int:
+    """
+    Cargamos en la base de datos local un fichero de resultados (el de
+    guardar_resultados o el de una descarga en streaming). Si no se indica
+    la consulta, se usa el nombre del fichero.
+    """
+    df = leer_resultados(ruta)
+    conexion = abrir_base_datos(ruta_base_datos(output_path))
+    try:
+        return ingerir_filas(conexion, df.to_dict('records'), consulta or ruta.stem, list(df.columns))
+    finally:
+        conexion.close()
+
+def consultar_base_datos(output_path:Path=Path(__file__).resolve().parent,
+                         texto:str | None = None,
+                         autor:str | None = None,
+                         pais:str | None = None,
+                         tema:str | None = None,
+                         desde:int | None = None,
+                         hasta:int | None = None,
+                         consulta:str | None = None,
+                         limite:int | None = None) -> pd.DataFrame:
+    """
+    Buscamos en la base de datos local, sin navegador ni red.
+    texto se busca en el índice FTS5 de las concordancias (palabras,
+    "frases exactas", OR, prefijos con *...), sin distinguir tildes ni
+    mayúsculas. autor, país, tema y consulta tienen que coincidir
+    exactamente y desde/hasta filtran por el año de la fecha.
+    """
+    import pandas as pd
+    ruta = ruta_base_datos(output_path)
+    if not ruta.exists():
+        raise ValueError(f'No hay ninguna base de datos en {ruta}')
+    condiciones, parametros = [], []
+    if texto:
+        condiciones.append('id IN (SELECT rowid FROM concordancias_fts WHERE concordancias_fts MATCH ?)')
+        parametros.append(texto)
+    for columna, valor in (('autor', autor), ('pais', pais), ('tema', tema), ('consulta', consulta)):
+        if valor is not None:
+            condiciones.append(f'{columna} = ?')
+            parametros.append(valor)
+    if desde is not None:
+        condiciones.append('anio >= ?')
+        parametros.append(desde)
+    if hasta is not None:
+        condiciones.append('anio <= ?')
+        parametros.append(hasta)
+    sql = f"SELECT {', '.join(COLUMNAS_BD)}, consulta FROM concordancias"
+    if condiciones:
+        sql += ' WHERE ' + ' AND '.join(condiciones)
+    sql += ' ORDER BY id'
+    if limite:
+        sql += ' LIMIT ?'
+        parametros.append(limite)
+    conexion = sqlite3.connect(ruta)
+    try:
+        if texto:
+            # Comprobamos antes la sintaxis de la búsqueda ('villa AND',
+            # comillas sin cerrar...): pandas envolvería el error de sqlite
+            try:
+                conexion.execute('SELECT 1 FROM concordancias_fts WHERE concordancias_fts MATCH ? LIMIT 1',
+                                 (texto,)).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError(f'La búsqueda {texto!r} no es válida: {e}') from None
+        df = pd.read_sql_query(sql, conexion, params=parametros)
+    finally:
+        conexion.close()
+    return df.rename(columns={**COLUMNAS_BD, 'consulta': 'Consulta'})
 
-def guardar_resultados(resultados:list[dict], 
+class EscritorSQLite(EscritorResultados):
+    """
+    Guarda las filas en la base de datos local (ver abrir_base_datos),
+    con un commit por página, para poder consultarlas después sin volver
+    a descargar nada (subcomando query).
+    """
+    extension = '.sqlite'
+    duradero = True
+
+    def __init__(self, output_path:Path, punto:dict | None = None, consulta:str | None = None):
+        super().__init__(output_path, punto, consulta)
+        # Todas las consultas van a la misma base de datos; las que no
+        # tienen nombre se distinguen por la fecha y hora de la descarga
+        self.consulta = consulta or _nombre_salida()
+        self._conexion = abrir_base_datos(self.ruta)
+
+    def _ruta(self, output_path:Path, consulta:str | None) -> Path:
+        return ruta_base_datos(output_path)
+
+    def escribir(self, filas:list[dict]) -> None:
+        if not filas:
+            return
+        if self.columnas is None:
+            self.columnas = list(filas[0].keys())
+        self.filas_escritas += ingerir_filas(self._conexion, filas, self.consulta, self.columnas)
+
+    def cerrar(self) -> None:
+        self._conexion.close()
+
+ESCRITORES = {'csv': EscritorCSV,
+              'excel': EscritorExcel,
+              'parquet': EscritorParquet,
+              'feather': EscritorFeather,
+              'sqlite': EscritorSQLite}
+
+def abrir_escritor(format:str='excel',
+                   output_path:Path=Path(__file__).resolve().parent,
+                   punto:dict | None = None,
+                   consulta:str | None = None) -> EscritorResultados:
+    """
+    Devuelve el escritor incremental para el formato indicado
+    """
+    if format not in ESCRITORES:
+        raise ValueError('Formato no reconocido.')
+    return ESCRITORES[format](output_path, punto, consulta)
+
+@PERFIL.medido('descarga_streaming')
+def descargar_por_paginas(concordancias:Callable[..., Iterator[list[dict]]],
+                          format:str='excel',
+                          output_path:Path=Path(__file__).resolve().parent,
+                          consulta:str | None = None,
+                          claves_conocidas:set[str] | None = None,
+                          punto:dict | None = None) -> EscritorResultados:
+    """
+    Descarga en streaming: cada página se escribe en cuanto se parsea y
+    después se guarda un checkpoint con la consulta, la última página,
+    el último ID y las filas escritas.
+    Los formatos que solo quedan en disco al cerrar el fichero (excel,
+    parquet, feather) no avanzan el checkpoint con cada página: si el
+    proceso muere sin cerrarlo, esas filas se pierden y hay que volver a
+    descargarlas desde el último punto guardado. Al cerrarlos (también
+    si hay un error) ya se guarda su progreso.
+    concordancias es el generador del motor elegido (por ejemplo
+    partial(iterar_concordancias, driver)); se llama con claves_conocidas,
+    ultimo_id y saltar.
+    Si se pasa punto (un checkpoint anterior) saltamos las páginas ya
+    descargadas y continuamos sin repetir filas.
+    Al terminar sin errores el checkpoint se borra.
+    """
+    checkpoint = ruta_checkpoint(consulta, output_path)
+    indice = ruta_indice(consulta, output_path) if consulta else None
+    pagina, ultimo_id = 0, None
+    if punto:
+        pagina, ultimo_id = punto['pagina'], punto['ultimo_id']
+        logging.info(f'Reanudando tras la página {pagina} (última concordancia: {ultimo_id})')
+    def progreso(salida:str | None, columnas:list | None, filas_escritas:int) -> dict:
+        return {'consulta': consulta,
+                'formato': format,
+                'salida': salida,
+                'columnas': columnas,
+                'pagina': pagina,
+                'ultimo_id': ultimo_id,
+                'filas_escritas': filas_escritas,
+                'actualizado': datetime.now().isoformat(timespec='seconds')}
+
+    # Huellas de las concordancias escritas que aún no están en el índice
+    pendientes = []
+    escritor = abrir_escritor(format, output_path, punto, consulta)
+    if not escritor.duradero:
+        # Hasta cerrar el fichero no hay nada en disco: si el proceso muere
+        # hay que reanudar desde lo último que sí se guardó
+        guardar_checkpoint(checkpoint, progreso(punto.get('salida') if punto else None,
+                                                punto.get('columnas') if punto else None,
+                                                escritor.filas_escritas))
+    avance = None
+    try:
+        for filas in concordancias(claves_conocidas=claves_conocidas, ultimo_id=ultimo_id, saltar=pagina):
+            pagina += 1
+            with PERFIL.medir('escritura', pagina):
+                escritor.escribir(filas)
+            # Sin índice (sin -c) no guardamos nada por fila: del progreso
+            # solo hace falta el número de la última concordancia
+            if indice:
+                pendientes.extend(clave_fila(fila) for fila in filas)
+            if filas:
+                ultimo_id = id_fila(filas[-1])
+            avance = progreso(str(escritor.ruta), escritor.columnas, escritor.filas_escritas)
+            if escritor.duradero:
+                if indice:
+                    guardar_indice(indice, pendientes)
+                    pendientes = []
+                guardar_checkpoint(checkpoint, avance)
+    finally:
+        # Al cerrar el escritor (también si hay un error) el excel se
+        # guarda, así que ya podemos apuntar sus huellas en el índice y su
+        # progreso en el checkpoint. Si falla al cerrarse no apuntamos nada
+        escritor.cerrar()
+        if indice and pendientes:
+            guardar_indice(indice, pendientes)
+        if avance and not escritor.duradero:
+            guardar_checkpoint(checkpoint, avance)
+    checkpoint.unlink(missing_ok=True)
+    return escritor
+
+def reparsear(consulta:str | None,
+              format:str='excel',
+              output_path:Path=Path(__file__).resolve().parent,
+              procesos:int | None = None) -> EscritorResultados:
+    """
+    Volvemos a generar los resultados de una consulta solo a partir de las
+    páginas de la caché, sin navegador ni red (por ejemplo, después de
+    corregir parsear_concordancia). Con procesos se parsean en paralelo.
+    """
+    cache = CachePaginas(output_path / 'cache', consulta)
+    if not cache.paginas():
+        raise ValueError('No hay páginas en la caché para esta consulta')
+    # Usamos otro nombre para no pisar el fichero de la descarga original
+    with abrir_escritor(format, output_path, consulta=f"{consulta or 'ultima'}_reparse") as escritor:
+        for filas in concordancias_de_paginas(cache.leer(), procesos=procesos):
+            escritor.escribir(filas)
+    return escritor
+
+@PERFIL.medido('exportacion')
+def guardar_resultados(resultados:BufferConcordancias | list[dict] | pd.DataFrame, 
                        format:str='excel', 
-                       output_path:Path=Path(__file__).resolve().parent)->None:
+                       output_path:Path=Path(__file__).resolve().parent,
+                       consulta:str | None = None)->Path:
     """
     Una vez que ya hemos completado el parsing de la web vamos a guardar
-    los resultados en dos posibles formatos: csv o excel
+    los resultados en uno de estos formatos: csv, excel, parquet o feather
+    (o en la base de datos local, con sqlite)
     
-    Para ello crearemos un dataframe: los resultados no son más que una
-    lista de resultados.
+    Para ello crearemos un dataframe: los resultados son un
+    BufferConcordancias (o una lista de resultados, o ya un DataFrame).
     
-    Y después llamaremos al método correspondiente
+    Y después llamaremos al método correspondiente. Devuelve la ruta
+    del fichero guardado.
     """
-    if format not in ['excel','csv']:
+    import pandas as pd
+    if format not in ESCRITORES:
         raise ValueError('Formato no reconocido.')
     if resultados is None or len(resultados) < 1:
         raise ValueError('No hay resultados para exportar')
-    df = pd.DataFrame.from_records(resultados)
-    # Crearemos una carpeta con los resultados de hoy
-    today_str = date.today().strftime("%d-%m-%Y") 
-    final_path = output_path / 'results' / today_str
-    final_path.mkdir(parents=True, exist_ok=True)
+    if isinstance(resultados, BufferConcordancias):
+        df = resultados.a_dataframe()
+    elif isinstance(resultados, pd.DataFrame):
+        df = resultados.copy()
+    else:
+        df = pd.DataFrame.from_records(resultados)
     
     # Ahora guardamos en el formato especificado:
-    if format == 'csv':
-        file_name = datetime.now().strftime("%Y-%m-%d_%H-%M") + '.csv'
-        df.to_csv(final_path/file_name)
+    if format == 'sqlite':
+        ruta = ruta_base_datos(output_path)
+        conexion = abrir_base_datos(ruta)
+        try:
+            ingerir_filas(conexion, df.to_dict('records'), consulta or _nombre_salida(),
+                          list(df.columns))
+        finally:
+            conexion.close()
+    elif format == 'csv':
+        ruta = _ruta_salida('.csv', output_path, consulta)
+        df.to_csv(ruta)
     elif format == 'excel':
-        file_name = datetime.now().strftime("%Y-%m-%d_%H-%M") + '.xlsx'
-        df.to_excel(final_path/file_name)
+        # Si no caben en una hoja, repartimos las filas en varias
+        ruta = _ruta_salida('.xlsx', output_path, consulta)
+        with pd.ExcelWriter(ruta) as excel:
+            for hoja, inicio in enumerate(range(0, len(df), LIMITE_FILAS_EXCEL), start=1):
+                df.iloc[inicio:inicio + LIMITE_FILAS_EXCEL].to_excel(excel, sheet_name=f'Sheet{hoja}')
+    else:
+        # Las columnas que se repiten se guardan como categóricas
+        for columna in df.columns:
+            if _es_categorica(columna):
+                df[columna] = df[columna].astype('category')
+        if format == 'parquet':
+            ruta = _ruta_salida('.parquet', output_path, consulta)
+            df.to_parquet(ruta, index=False, compression='zstd', row_group_size=FILAS_POR_GRUPO)
+        else:
+            ruta = _ruta_salida('.feather', output_path, consulta)
+            df.to_feather(ruta, compression='lz4')
+    return ruta
+
+def abrir_consulta_navegador(navegador:str):
+    """
+    Abrimos el CORDE en el navegador y esperamos a que el usuario
+    configure su búsqueda y pulse <<Recuperar>>. Devuelve el driver ya
+    situado en la primera página de resultados.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import StaleElementReferenceException
+    driver = configurar_driver(navegador)
+    driver.set_page_load_timeout(300)
+    driver.set_script_timeout(300)
+    # Iniciamos la url del corde
+    driver.get(url=CORDE_URL)
+    
+    # Esperamos como máximo 5 minutos hasta que se muestre la página de
+    # obtención de resultados
+    try:
+        _ = WebDriverWait(driver, 300, ignored_exceptions=[StaleElementReferenceException]).until(
+            EC.presence_of_element_located(
+                (By.CSS_SELECTOR, "td.submenu1")
+            )
+        )
+    except Exception as e:
+        print('no encontramos nada y ha habido una excepción', e)
+        logging.error("No se mostraron resultados en el tiempo esperado")
+        
+    # Ahora que ha cargado la página el usuario configura su búsqueda
+    # desde el nabegador. Nosotros extraemos el boton que el usuario
+    # utilizará para comenzar la búsqueda
+    submit_btn = driver.find_element(By.CSS_SELECTOR, "input[type='submit'][value='Recuperar']")
+
+    logging.info('Esperando a que el usuario haga click en el botón <<Recuperar>>')
+
+    # Esperamos a que el botón desaparezca es decir, que ya no exista 
+    # como resultado de enviar la petición
+    WebDriverWait(driver, 300).until(EC.staleness_of(submit_btn))
+    return driver
+
+def cargar_consulta_http(ruta:Path) -> dict:
+    """
+    Leemos la definición de una consulta para el motor HTTP (ver
+    leer_paginas_http) desde un fichero JSON
+    """
+    with open(ruta, encoding='utf-8') as f:
+        consulta = json.load(f)
+    if 'url' not in consulta:
+        raise ValueError(f'La consulta {ruta} no indica la URL del formulario')
+    return consulta
+
+def buscar_en_navegador(driver, campos:dict) -> None:
+    """
+    Rellenamos nosotros el formulario de búsqueda del CORDE (sin esperar
+    al usuario) y pulsamos <<Recuperar>>.
+    campos relaciona el atributo name de cada campo con su valor:
+    - en los desplegables, el texto de la opción
+    - en los checkbox, true o false
+    - en los radio, el value de la opción que se marca
+    - en el resto, el texto que se escribe
+    Si no se indica otra cosa se piden Concordancias.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait, Select
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import StaleElementReferenceException
+    driver.get(url=CORDE_URL)
+    WebDriverWait(driver, 300, ignored_exceptions=[StaleElementReferenceException]).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "td.submenu1"))
+    )
+    for nombre, valor in {'tipo1': 'Concordancias', **campos}.items():
+        elemento = driver.find_element(By.NAME, nombre)
+        tipo = elemento.get_attribute('type')
+        if elemento.tag_name == 'select':
+            Select(elemento).select_by_visible_text(str(valor))
+        elif tipo == 'checkbox':
+            if elemento.is_selected() != bool(valor):
+                elemento.click()
+        elif tipo == 'radio':
+            driver.find_element(By.CSS_SELECTOR, f"input[name='{nombre}'][value='{valor}']").click()
+        else:
+            elemento.clear()
+            elemento.send_keys(str(valor))
+    submit_btn = driver.find_element(By.CSS_SELECTOR, "input[type='submit'][value='Recuperar']")
+    submit_btn.click()
+    WebDriverWait(driver, 300).until(EC.staleness_of(submit_btn))
+
+class PoolDrivers:
+    """
+    Pool de navegadores ya arrancados (por defecto sin ventana) para
+    lanzar varias consultas a la vez. Se toma un driver con
+    `with pool.driver() as driver:` y al salir vuelve al pool; si la
+    consulta falla, el navegador se sustituye por uno nuevo.
+    """
+
+    def __init__(self, navegador:str, tamanio:int=2, headless:bool=True):
+        self.navegador = navegador
+        self.headless = headless
+        self._libres = queue.Queue()
+        # El primero lo arrancamos solo: si hay que descargar el binario
+        # del driver se descarga una única vez y el resto lo reutiliza
+        self._libres.put(self._nuevo_driver())
+        if tamanio > 1:
+            with ThreadPoolExecutor(max_workers=tamanio - 1) as pool:
+                for driver in pool.map(lambda _: self._nuevo_driver(), range(tamanio - 1)):
+                    self._libres.put(driver)
+
+    def _nuevo_driver(self):
+        driver = configurar_driver(self.navegador, self.headless)
+        driver.set_page_load_timeout(300)
+        driver.set_script_timeout(300)
+        return driver
+
+    @contextmanager
+    def driver(self):
+        driver = self._libres.get()
+        try:
+            yield driver
+        except Exception:
+            # El navegador puede haber quedado en mal estado
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            driver = self._nuevo_driver()
+            raise
+        finally:
+            self._libres.put(driver)
+
+    def cerrar(self) -> None:
+        while not self._libres.empty():
+            self._libres.get_nowait().quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cerrar()
+
+def _tramos_fechas(desde:int, hasta:int, tramo:int) -> list[tuple[int, int]]:
+    """Dividimos los años de desde a hasta (incluidos) en tramos de tramo años"""
+    if tramo < 1 or hasta < desde:
+        raise ValueError(f'Rango de fechas no válido: {desde}-{hasta} en tramos de {tramo}')
+    return [(inicio, min(inicio + tramo - 1, hasta)) for inicio in range(desde, hasta + 1, tramo)]
+
+def planificar_fragmentos(definicion:dict) -> list[dict]:
+    """
+    Dividimos una consulta muy amplia en subconsultas (fragmentos) que se
+    pueden descargar por separado, en varios navegadores o máquinas.
+    Además de nombre y campos (ver cargar_lote) la definición puede tener:
+    {
+        fechas: {desde: 1200, hasta: 1499, tramo: 50,
+                 campo_desde: 'desde', campo_hasta: 'hasta'}
+        paises: {campo: nombre del campo, valores: [...]}
+        temas: {campo: nombre del campo, valores: [...]}
+    }
+    y se genera un fragmento por cada combinación de tramo de años, país
+    y tema, con los campos de la consulta más los del fragmento.
+    Una consulta sin nada de esto se devuelve tal cual.
+    """
+    divisiones = []
+    fechas = definicion.get('fechas')
+    if fechas:
+        campo_desde, campo_hasta = fechas.get('campo_desde', 'desde'), fechas.get('campo_hasta', 'hasta')
+        divisiones.append([(f'{inicio}-{fin}', {campo_desde: str(inicio), campo_hasta: str(fin)})
+                           for inicio, fin in _tramos_fechas(int(fechas['desde']), int(fechas['hasta']),
+                                                             int(fechas.get('tramo', 50)))])
+    for clave in ('paises', 'temas'):
+        if definicion.get(clave):
+            campo = definicion[clave]['campo']
+            divisiones.append([(str(valor), {campo: valor}) for valor in definicion[clave]['valores']])
+    base = {clave: valor for clave, valor in definicion.items() if clave not in ('fechas', 'paises', 'temas')}
+    fragmentos = [base]
+    for division in divisiones:
+        fragmentos = [{**fragmento,
+                       'nombre': f"{fragmento['nombre']}_{sufijo}",
+                       'campos': {**fragmento.get('campos', {}), **campos}}
+                      for fragmento in fragmentos for sufijo, campos in division]
+    return fragmentos
+
+def repartir_fragmentos(fragmentos:list[dict], partes:int) -> list[list[dict]]:
+    """
+    Repartimos los fragmentos en partes (por ejemplo, una por máquina)
+    alternándolos, para que todas tengan más o menos los mismos
+    """
+    return [fragmentos[i::partes] for i in range(partes) if fragmentos[i::partes]]
+
+def cargar_lote(ruta:Path) -> list[dict]:
+    """
+    Leemos un lote de consultas desde un JSON: una lista de objetos con
+    {
+        nombre: nombre de la consulta (índice, checkpoint y fichero de salida)
+        campos: campos del formulario (ver buscar_en_navegador)
+    }
+    Las consultas con fechas, paises o temas se dividen en sus
+    fragmentos (ver planificar_fragmentos).
+    """
+    with open(ruta, encoding='utf-8') as f:
+        lote = [fragmento for definicion in json.load(f) for fragmento in planificar_fragmentos(definicion)]
+    nombres = [definicion.get('nombre') for definicion in lote]
+    if None in nombres or len(set(nombres)) != len(nombres):
+        raise ValueError(f'Todas las consultas de {ruta} deben tener un nombre distinto')
+    return lote
+
+def _ejecutar_consulta_lote(pool:PoolDrivers,
+                            definicion:dict,
+                            format:str,
+                            output_path:Path,
+                            rapido:bool,
+                            cache_bytes:int | None) -> dict:
+    """
+    Ejecutamos una consulta del lote con un driver del pool y devolvemos
+    su resumen. Los errores no paran el lote: se anotan en el resumen.
+    """
+    nombre = definicion['nombre']
+    resumen = {'consulta': nombre, 'estado': 'ok', 'filas': 0, 'segundos': 0.0, 'salida': '', 'error': ''}
+    inicio = time.perf_counter()
+    try:
+        indice = ruta_indice(nombre, output_path)
+        with pool.driver() as driver:
+            buscar_en_navegador(driver, definicion.get('campos', {}))
+            # Si una ejecución anterior se cortó, seguimos desde su checkpoint
+            punto = cargar_checkpoint(ruta_checkpoint(nombre, output_path))
+            cache = CachePaginas(output_path / 'cache', nombre, cache_bytes) if cache_bytes else None
+            escritor = descargar_por_paginas(partial(iterar_concordancias, driver, rapido=rapido, cache=cache),
+                                             punto['formato'] if punto else format,
+                                             output_path, nombre, cargar_indice(indice), punto)
+        resumen['filas'] = escritor.filas_escritas
+        resumen['salida'] = str(escritor.ruta)
+    except Exception as e:
+        logging.error(f'La consulta {nombre} ha fallado: {e}')
+        resumen['estado'] = 'error'
+        resumen['error'] = str(e).splitlines()[0] if str(e) else type(e).__name__
+    resumen['segundos'] = round(time.perf_counter() - inicio, 1)
+    return resumen
+
+def ejecutar_lote(ruta_lote:Path,
+                  navegador:str='firefox',
+                  drivers:int=2,
+                  headless:bool=True,
+                  format:str='excel',
+                  output_path:Path=Path(__file__).resolve().parent,
+                  rapido:bool=False,
+                  cache_bytes:int | None = None) -> list[dict]:
+    """
+    Ejecutamos sin intervención todas las consultas de un lote,
+    repartiéndolas entre un pool de navegadores. Devuelve el resumen de
+    cada consulta en el orden del lote.
+    """
+    lote = cargar_lote(ruta_lote)
+    drivers = max(1, min(drivers, len(lote)))
+    logging.info(f'Ejecutando {len(lote)} consultas con {drivers} navegadores')
+    with PoolDrivers(navegador, drivers, headless) as pool:
+        with ThreadPoolExecutor(max_workers=drivers) as ejecutor:
+            return list(ejecutor.map(lambda definicion: _ejecutar_consulta_lote(pool, definicion, format,
+                                                                                output_path, rapido,
+                                                                                cache_bytes),
+                                     lote))
+
+def imprimir_resumen(resumenes:list[dict]) -> None:
+    """
+    Mostramos una línea por consulta con su estado, filas y tiempo
+    """
+    print(f"{'Consulta':<30} {'Estado':<6} {'Filas':>8} {'Tiempo':>9}  Salida / error")
+    for resumen in resumenes:
+        detalle = resumen['salida'] if resumen['estado'] == 'ok' else resumen['error']
+        print(f"{resumen['consulta']:<30} {resumen['estado']:<6} {resumen['filas']:>8} "
+              f"{resumen['segundos']:>8.1f}s  {detalle}")
+
+def leer_resultados(ruta:Path) -> pd.DataFrame:
+    """
+    Leemos un fichero de resultados en cualquiera de los formatos de
+    salida (todas las hojas, si es un Excel) con todas las columnas como texto
+    """
+    import pandas as pd
+    extension = ruta.suffix.lower()
+    if extension == '.csv':
+        df = pd.read_csv(ruta, dtype=str, keep_default_na=False)
+    elif extension == '.xlsx':
+        df = pd.concat(pd.read_excel(ruta, sheet_name=None, dtype=str, keep_default_na=False).values(),
+                       ignore_index=True)
+    elif extension in ('.parquet', '.feather'):
+        df = pd.read_parquet(ruta) if extension == '.parquet' else pd.read_feather(ruta)
+        df = df.astype(object).where(df.notna(), '').astype(str)
+    else:
+        raise ValueError(f'Formato de resultados no reconocido: {ruta}')
+    # La columna del índice que añade pandas al guardar en CSV o Excel
+    return df.drop(columns=[columna for columna in df.columns if str(columna).startswith('Unnamed: ')])
+
+def fusionar_resultados(rutas:Iterable[Path],
+                        format:str='excel',
+                        output_path:Path=Path(__file__).resolve().parent,
+                        consulta:str | None = None) -> tuple[Path, int, int]:
+    """
+    Juntamos en un único fichero los resultados de los fragmentos de una
+    consulta (ver planificar_fragmentos).
+    Un mismo documento puede salir en dos fragmentos (por ejemplo, si su
+    fecha es un intervalo que cae en dos tramos), así que quitamos las
+    concordancias repetidas. El número de concordancia es solo su posición
+    dentro de cada fragmento, por eso comparamos la fecha y el resto de
+    campos y al final volvemos a numerar.
+    Dentro de un fragmento puede haber concordancias idénticas que son
+    apariciones distintas (una fórmula repetida en el mismo documento):
+    esas se conservan. Solo se quitan las que vuelven a salir en otro
+    fragmento, comparando cada aparición con la del mismo orden.
+    Devuelve la ruta del fichero, las filas guardadas y las repetidas.
+    """
+    import pandas as pd
+    partes = []
+    for ruta in rutas:
+        parte = leer_resultados(Path(ruta))
+        # Cuántas veces ha salido ya la misma concordancia en este fragmento
+        parte['_aparicion'] = parte.groupby(list(parte.columns[1:]), sort=False, dropna=False).cumcount()
+        partes.append(parte)
+    df = pd.concat(partes, ignore_index=True)
+    if df.empty:
+        raise ValueError('No hay resultados que fusionar')
+    numero = df.columns[0]
+    total = len(df)
+    df = df.drop_duplicates(subset=list(df.columns[1:]), ignore_index=True).drop(columns='_aparicion')
+    df[numero] = [str(n) for n in range(1, len(df) + 1)]
+    ruta = guardar_resultados(df, format, output_path, consulta)
+    return ruta, len(df), total - len(df)
+
+def _entero_desde(valor:str, minimo:int) -> int:
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{valor!r} no es un número entero')
+    if numero < minimo:
+        raise argparse.ArgumentTypeError(f'tiene que ser {minimo} o más (se ha indicado {numero})')
+    return numero
+
+def entero_positivo(valor:str) -> int:
+    """
+    Tipo de argparse para las opciones que necesitan un entero mayor que 0
+    """
+    return _entero_desde(valor, 1)
+
+def entero_no_negativo(valor:str) -> int:
+    """
+    Tipo de argparse para las opciones que admiten 0 pero no negativos
+    """
+    return _entero_desde(valor, 0)
 
 def main():
     # Configuramos un CLI para poder ejecutar el navegador que queremos
@@ -354,16 +2338,169 @@ def main():
                         action='store', 
                         default='excel', 
                         type=str, 
-                        choices=['csv', 'excel'], 
+                        choices=['csv', 'excel', 'parquet', 'feather', 'sqlite'], 
                         help='Selecciona el fomato en el que se guardarán los resultados.')
     parser.add_argument("-o", "--output", 
                         type=Path, 
                         default=Path(__file__).resolve().parent, 
                         help="Directorio de salida para los resultados. Por defecto el directorio de instalación")
+    parser.add_argument("-c", "--consulta", 
+                        type=str, 
+                        default=None, 
+                        help="Nombre de la consulta. Si se indica, se guarda un índice con las concordancias descargadas y las que ya estén en él no se vuelven a exportar")
+    parser.add_argument("-s", "--stream", 
+                        action="store_true", 
+                        help="Escribe los resultados página a página en lugar de guardarlos todos al final")
+    parser.add_argument("-r", "--resume", 
+                        action="store_true", 
+                        help="Reanuda la última descarga interrumpida de la consulta (-c) desde su checkpoint. Implica --stream")
+    parser.add_argument("--fast", 
+                        action="store_true", 
+                        help="Paginación rápida: una sola llamada al navegador por página y sin recargarla")
+    parser.add_argument("--http", 
+                        type=Path, 
+                        default=None, 
+                        metavar="CONSULTA.json", 
+                        help="Descarga sin navegador (motor HTTP). El JSON indica la URL del formulario del CORDE y sus parámetros")
+    parser.add_argument("-j", "--concurrencia", 
+                        type=entero_positivo, 
+                        default=1, 
+                        help="Con --http, número máximo de páginas que se piden a la vez")
+    parser.add_argument("--rps", 
+                        type=float, 
+                        default=2.0, 
+                        help="Con --http, máximo de peticiones por segundo al servidor (0 para no limitar)")
+    parser.add_argument("-p", "--procesos", 
+                        type=entero_no_negativo, 
+                        default=None, 
+                        help="Solapa la lectura, el parseo y la escritura: la página siguiente se lee mientras se parsean las anteriores en N procesos (0 para parsear en el proceso principal)")
+    parser.add_argument("--lote", 
+                        type=Path, 
+                        default=None, 
+                        metavar="CONSULTAS.json", 
+                        help="Ejecuta sin intervención todas las consultas del fichero repartidas entre varios navegadores")
+    parser.add_argument("--drivers", 
+                        type=int, 
+                        default=2, 
+                        help="Con --lote, número de navegadores que se usan a la vez")
+    parser.add_argument("--headless", 
+                        action="store_true", 
+                        help="Con --lote, arranca los navegadores sin ventana")
+    parser.add_argument("--cache-mb", 
+                        type=entero_no_negativo, 
+                        default=1024, 
+                        help="Tamaño máximo en MB de la caché de páginas descargadas (0 para no guardarlas)")
+    parser.add_argument("--profile", 
+                        type=Path, 
+                        default=None, 
+                        metavar="PERFIL.json", 
+                        help="Guarda al terminar los tiempos por etapa y por página y los contadores de la ejecución (JSON, o CSV si acaba en .csv)")
+    parser.add_argument("--cprofile", 
+                        type=Path, 
+                        default=None, 
+                        metavar="PERFIL.prof", 
+                        help="Guarda además un perfil de cProfile de toda la ejecución (se puede abrir con pstats o snakeviz)")
     parser.add_argument("-v", "--verbose", 
                         action="store_true", 
                         help="Ajusta el logging a INFO-level"
     )
+    subparsers = parser.add_subparsers(dest='comando', metavar='comando')
+    reparse = subparsers.add_parser('reparse', 
+                                    help='Regenera los resultados de una consulta desde la caché, sin navegador ni red')
+    reparse.add_argument('consulta', 
+                         nargs='?', 
+                         default=None, 
+                         help='Nombre de la consulta (-c) con la que se descargó. Por defecto la última sin nombre')
+    # Las opciones comunes también se aceptan después del subcomando
+    reparse.add_argument('-f', '--format', 
+                         default=argparse.SUPPRESS, 
+                         choices=['csv', 'excel', 'parquet', 'feather', 'sqlite'], 
+                         help='Formato de salida')
+    reparse.add_argument('-o', '--output', 
+                         type=Path, 
+                         default=argparse.SUPPRESS, 
+                         help='Directorio de salida (el mismo de la descarga, donde está la caché)')
+    reparse.add_argument('-p', '--procesos', 
+                         type=entero_no_negativo, 
+                         default=argparse.SUPPRESS, 
+                         help='Parsea las páginas en N procesos')
+    fragmentar = subparsers.add_parser('fragmentar', 
+                                       help='Divide las consultas de un plan por años (y países o temas) en lotes para --lote')
+    fragmentar.add_argument('plan', 
+                            type=Path, 
+                            help='JSON con las consultas y cómo dividirlas (ver planificar_fragmentos)')
+    fragmentar.add_argument('--partes', 
+                            type=int, 
+                            default=1, 
+                            help='Número de lotes en que se reparten los fragmentos (por ejemplo, uno por máquina)')
+    fusionar = subparsers.add_parser('fusionar', 
+                                     help='Junta los resultados de los fragmentos de una consulta quitando los repetidos')
+    fusionar.add_argument('ficheros', 
+                          type=Path, 
+                          nargs='+', 
+                          help='Ficheros de resultados de los fragmentos (csv, xlsx, parquet o feather)')
+    fusionar.add_argument('-c', '--consulta', 
+                          default=argparse.SUPPRESS, 
+                          help='Nombre de la consulta para el fichero fusionado')
+    fusionar.add_argument('-f', '--format', 
+                          default=argparse.SUPPRESS, 
+                          choices=['csv', 'excel', 'parquet', 'feather', 'sqlite'], 
+                          help='Formato de salida')
+    fusionar.add_argument('-o', '--output', 
+                          type=Path, 
+                          default=argparse.SUPPRESS, 
+                          help='Directorio de salida')
+    ingest = subparsers.add_parser('ingest', 
+                                   help='Carga ficheros de resultados en la base de datos local (concordancias.sqlite)')
+    ingest.add_argument('ficheros', 
+                        type=Path, 
+                        nargs='+', 
+                        help='Ficheros de resultados (csv, xlsx, parquet o feather)')
+    ingest.add_argument('-c', '--consulta', 
+                        default=argparse.SUPPRESS, 
+                        help='Consulta a la que pertenecen. Por defecto, el nombre de cada fichero')
+    ingest.add_argument('-o', '--output', 
+                        type=Path, 
+                        default=argparse.SUPPRESS, 
+                        help='Directorio de salida, donde está la base de datos')
+    query = subparsers.add_parser('query', 
+                                  help='Busca en la base de datos local y exporta los resultados, sin navegador ni red')
+    query.add_argument('texto', 
+                       nargs='?', 
+                       default=None, 
+                       help='Texto que se busca en las concordancias (sintaxis de FTS5: palabras, "frases", OR, prefijo*)')
+    query.add_argument('--autor', 
+                       default=None, 
+                       help='Autor (exacto)')
+    query.add_argument('--pais', 
+                       default=None, 
+                       help='País (exacto)')
+    query.add_argument('--tema', 
+                       default=None, 
+                       help='Tema (exacto)')
+    query.add_argument('--desde', 
+                       type=int, 
+                       default=None, 
+                       help='Año mínimo')
+    query.add_argument('--hasta', 
+                       type=int, 
+                       default=None, 
+                       help='Año máximo')
+    query.add_argument('-c', '--consulta', 
+                       default=argparse.SUPPRESS, 
+                       help='Solo las concordancias de esta consulta')
+    query.add_argument('--limite', 
+                       type=int, 
+                       default=None, 
+                       help='Número máximo de resultados')
+    query.add_argument('-f', '--format', 
+                       default=argparse.SUPPRESS, 
+                       choices=['csv', 'excel', 'parquet', 'feather'], 
+                       help='Formato de salida')
+    query.add_argument('-o', '--output', 
+                       type=Path, 
+                       default=argparse.SUPPRESS, 
+                       help='Directorio de salida, donde está la base de datos')
     args = parser.parse_args()
     # Configruamos el logging
     log_level = logging.INFO if args.verbose else logging.WARNING
@@ -375,11 +2512,82 @@ def main():
     )
     logging.info("Comenzando la ejecución del script.")
 
+    PERFIL.activo = args.profile is not None
+    perfilador = cProfile.Profile() if args.cprofile else None
+    try:
+        if perfilador:
+            perfilador.enable()
+        ejecutar(args)
+    finally:
+        # Guardamos el perfil también si la ejecución falla o se interrumpe
+        if perfilador:
+            perfilador.disable()
+            perfilador.dump_stats(args.cprofile)
+            logging.info(f'Perfil de cProfile guardado en {args.cprofile}')
+        if args.profile:
+            PERFIL.guardar(args.profile)
+            logging.info(f'Perfil de la ejecución guardado en {args.profile}')
+
+def ejecutar(args:argparse.Namespace) -> None:
+    """
+    Ejecutamos lo que se ha pedido por la línea de comandos (ver main)
+    """
+    if args.comando == 'reparse':
+        escritor = reparsear(args.consulta, args.format, args.output, args.procesos)
+        logging.info(f'{escritor.filas_escritas} resultados guardados en {escritor.ruta}')
+        return
+    if args.comando == 'fragmentar':
+        lote = cargar_lote(args.plan)
+        partes = repartir_fragmentos(lote, max(1, args.partes))
+        for i, parte in enumerate(partes, start=1):
+            ruta = args.plan.with_name(f'{args.plan.stem}_lote{i if len(partes) > 1 else ""}.json')
+            ruta.write_text(json.dumps(parte, ensure_ascii=False, indent=4), encoding='utf-8')
+            print(f'{len(parte)} fragmentos en {ruta}')
+        return
+    if args.comando == 'ingest':
+        for fichero in args.ficheros:
+            nuevas = ingerir_fichero(fichero, args.output, args.consulta)
+            print(f'{nuevas} concordancias nuevas de {fichero}')
+        return
+    if args.comando == 'query':
+        inicio = time.perf_counter()
+        df = consultar_base_datos(args.output, args.texto, args.autor, args.pais, args.tema,
+                                  args.desde, args.hasta, args.consulta, args.limite)
+        segundos = time.perf_counter() - inicio
+        if df.empty:
+            print(f'Ninguna concordancia cumple la búsqueda ({segundos * 1000:.0f} ms)')
+            return
+        ruta = guardar_resultados(df, 'excel' if args.format == 'sqlite' else args.format, args.output, 'query')
+        print(f'{len(df)} concordancias en {segundos * 1000:.0f} ms, guardadas en {ruta}')
+        return
+    if args.comando == 'fusionar':
+        ruta, filas, repetidas = fusionar_resultados(args.ficheros, args.format, args.output, args.consulta)
+        print(f'{filas} resultados guardados en {ruta} ({repetidas} repetidos)')
+        return
+
+    cache_bytes = args.cache_mb * 2**20
+    if args.lote:
+        resumenes = ejecutar_lote(args.lote, args.browser.lower(), args.drivers, args.headless,
+                                  args.format, args.output, args.fast, cache_bytes)
+        imprimir_resumen(resumenes)
+        return
+
+    # Si reanudamos, recuperamos el checkpoint antes de abrir el navegador
+    punto = None
+    if args.resume:
+        punto = cargar_checkpoint(ruta_checkpoint(args.consulta, args.output))
+        if punto is None:
+            raise ValueError('No hay ningún checkpoint que reanudar para esta consulta')
+        args.stream = True
+        if punto['formato'] != args.format:
+            logging.info(f"Usamos el formato del checkpoint: {punto['formato']}")
+            args.format = punto['formato']
+    # Comprobamos el nombre de la consulta antes de abrir el navegador:
+    # si no es válido queremos saberlo ya, no después de rellenar el
+    # formulario. Cargamos su índice para no repetir concordancias
+    indice = ruta_indice(args.consulta, args.output) if args.consulta else None
+    claves_conocidas = cargar_indice(indice) if indice else set()
 
-    navegador = args.browser.lower()
-    driver = configurar_driver(navegador)
-    driver.set_page_load_timeout(300)
-    driver.set_script_timeout(300)
     # Vamos a mapear las opciones del usuario con el texto del CORDE
     RESULT_MAP = {'concord':'Concordancias',
                   'doc':'Documentos',
@@ -389,38 +2597,42 @@ def main():
     # Double-check
     if scrap_type is None:
         raise ValueError('Opción no reconocida para el tipo de documentos')
-    # Iniciamos la url del corde
-    url = 'https://corpus.rae.es/cordenet.html'
-    driver.get(url=url)
-    
-    # Esperamos como máximo 5 minutos hasta que se muestre la página de
-    # obtención de resultados
-    try:
-        _ = WebDriverWait(driver, 300, ignored_exceptions=[StaleElementReferenceException]).until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, "td.submenu1")
-            )
-        )
-    except Exception as e:
-        print('no encontramos nada y ha habido una excepción', e)
-        logging.error("No se mostraron resultados en el tiempo esperado")
-        
-    # Ahora que ha cargado la página el usuario configura su búsqueda
-    # desde el nabegador. Nosotros extraemos el boton que el usuario
-    # utilizará para comenzar la búsqueda
-    submit_btn = driver.find_element(By.CSS_SELECTOR, "input[type='submit'][value='Recuperar']")
-
-    logging.info('Esperando a que el usuario haga click en el botón <<Recuperar>>')
 
-    # Esperamos a que el botón desaparezca es decir, que ya no exista 
-    # como resultado de enviar la petición
-    WebDriverWait(driver, 300).until(EC.staleness_of(submit_btn))
+    cache = CachePaginas(args.output / 'cache', args.consulta, cache_bytes) if cache_bytes else None
+    driver = None
+    if args.http:
+        # Motor HTTP: no abrimos ningún navegador
+        concordancias = partial(iterar_concordancias_http, cargar_consulta_http(args.http),
+                                concurrencia=args.concurrencia,
+                                peticiones_por_segundo=args.rps,
+                                cache=cache,
+                                procesos=args.procesos)
+    else:
+        driver = abrir_consulta_navegador(args.browser.lower())
+        concordancias = partial(iterar_concordancias, driver, rapido=args.fast, cache=cache,
+                                procesos=args.procesos)
     
     logging.info('Analizando los resultados obtenidos en cada página')
-    resultados = extraer_concordancias(driver)
-    guardar_resultados(resultados,args.format,args.output)
-    logging.info('Resultados guardados de forma exitosa.')
-    driver.quit()
+    if args.stream:
+        # Cada página se escribe en cuanto se parsea
+        escritor = descargar_por_paginas(concordancias, args.format, args.output,
+                                         args.consulta, claves_conocidas, punto)
+        logging.info(f'{escritor.filas_escritas} resultados guardados en {escritor.ruta}')
+    else:
+        resultados = BufferConcordancias()
+        with PERFIL.medir('extraccion'):
+            for filas in concordancias(claves_conocidas=claves_conocidas):
+                resultados.extend(filas)
+        if resultados:
+            guardar_resultados(resultados, args.format, args.output, args.consulta)
+            logging.info('Resultados guardados de forma exitosa.')
+            # Solo actualizamos el índice cuando los resultados ya están guardados
+            if indice:
+                guardar_indice(indice, resultados.claves())
+        else:
+            logging.warning('No hay concordancias nuevas para esta consulta.')
+    if driver is not None:
+        driver.quit()
 
 if __name__ == "__main__":
     main()